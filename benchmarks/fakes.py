@@ -0,0 +1,400 @@
+"""In-process stand-ins for the Discord REST API and the Twitch client."""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, AsyncIterator
+
+from aiohttp import web
+from discord.http import Route
+
+_ids = itertools.count(1_100_000_000_000_000_000)
+
+
+def snowflake() -> int:
+    return next(_ids)
+
+
+def user_payload(user_id: int, bot: bool = False) -> dict[str, Any]:
+    return {
+        "id": str(user_id),
+        "username": f"user{user_id % 100000}",
+        "discriminator": "0",
+        "global_name": None,
+        "avatar": None,
+        "bot": bot,
+    }
+
+
+def member_payload(user_id: int, roles: list[int]) -> dict[str, Any]:
+    return {
+        "user": user_payload(user_id),
+        "roles": [str(role) for role in roles],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def channel_payload(channel_id: int, guild_id: int | None) -> dict[str, Any]:
+    payload: dict[str, Any] = {
+        "id": str(channel_id),
+        "type": 0,
+        "name": f"channel-{channel_id % 1000}",
+        "position": 0,
+        "permission_overwrites": [],
+        "nsfw": False,
+        "parent_id": None,
+    }
+    if guild_id is not None:
+        payload["guild_id"] = str(guild_id)
+    return payload
+
+
+def guild_payload(
+    guild_id: int, channel_ids: list[int], role_ids: list[int], members: list[dict[str, Any]]
+) -> dict[str, Any]:
+    roles = [
+        {
+            "id": str(role_id),
+            "name": f"role-{role_id % 1000}",
+            "permissions": "0",
+            "position": position,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": True,
+            "flags": 0,
+        }
+        for position, role_id in enumerate([guild_id, *role_ids])
+    ]
+    return {
+        "id": str(guild_id),
+        "name": f"guild-{guild_id % 1000}",
+        "owner_id": "1",
+        "roles": roles,
+        "channels": [channel_payload(channel_id, None) for channel_id in channel_ids],
+        "members": members,
+        "member_count": len(members),
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "premium_tier": 0,
+    }
+
+
+class FakeDiscordAPI:
+    """Answers discord.py's HTTPClient.request from canned payloads and counts every route.
+
+    Install it with install(bot); the bot's HTTP client then never opens a connection. The
+    bot's REST scheduler still sees every request, but with budgets lifted since nothing here
+    is rate limited.
+    channels maps channel ids to their guild so fetched channels resolve to it, and messages
+    keeps the ids posted to each channel so history reads and deletes see them."""
+
+    def __init__(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.channels: dict[int, int] = {}
+        self.members: dict[int, dict[str, Any]] = {}
+        self.messages: dict[int, list[int]] = {}
+        self.bot_user = user_payload(snowflake(), bot=True)
+
+    def install(self, bot: Any) -> None:
+        bot.rest.transport = self.request
+        bot.rest.set_budgets((1_000_000, 1.0), {})
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self) -> None:
+        self.calls.clear()
+
+    def message_payload(self, channel_id: int, message_id: int | None = None) -> dict[str, Any]:
+        return {
+            "id": str(message_id or snowflake()),
+            "channel_id": str(channel_id),
+            "author": self.bot_user,
+            "content": "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "reactions": [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        }
+
+    async def request(self, route: Route, **kwargs: Any) -> Any:
+        self.calls[route.key] += 1
+        return self.respond(route, kwargs)
+
+    def history(self, channel_id: int, params: dict[str, Any]) -> list[dict[str, Any]]:
+        """Returns up to limit messages newer than after, newest first like Discord does."""
+        after = int(params.get("after", 0))
+        posted = self.messages.get(channel_id, [])
+        page = [message_id for message_id in posted if message_id > after][
+            : int(params.get("limit", 50))
+        ]
+        return [self.message_payload(channel_id, message_id) for message_id in reversed(page)]
+
+    def respond(self, route: Route, kwargs: dict[str, Any]) -> Any:
+        """Returns the payload Discord would send for route; None for empty responses."""
+        method, path = route.method, route.path
+        last = route.url.rsplit("/", 1)[-1]
+
+        if path == "/users/@me":
+            return self.bot_user
+        if path == "/channels/{channel_id}":
+            channel_id = int(route.channel_id or 0)
+            return channel_payload(channel_id, self.channels.get(channel_id))
+        if path == "/channels/{channel_id}/messages" and method == "POST":
+            channel_id = int(route.channel_id or 0)
+            message_id = snowflake()
+            self.messages.setdefault(channel_id, []).append(message_id)
+            return self.message_payload(channel_id, message_id)
+        if path == "/channels/{channel_id}/messages" and method == "GET":
+            return self.history(int(route.channel_id or 0), kwargs.get("params", {}))
+        if path == "/channels/{channel_id}/messages/{message_id}":
+            channel_id = int(route.channel_id or 0)
+            if method == "DELETE":
+                if int(last) in self.messages.get(channel_id, []):
+                    self.messages[channel_id].remove(int(last))
+                return None
+            return self.message_payload(channel_id, int(last))
+        if path == "/users/@me/channels":
+            recipient = int(kwargs.get("json", {}).get("recipient_id", 0))
+            return {"id": str(snowflake()), "type": 1, "recipients": [user_payload(recipient)]}
+        if path == "/guilds/{guild_id}/members/{user_id}":
+            return self.members.get(int(last), member_payload(int(last), []))
+        return None
+
+
+class FakeTwitch:
+    """Twitch client double that serves one streamer's state and counts Helix calls."""
+
+    def __init__(self, login: str) -> None:
+        self.login = login
+        self.online = False
+        self.calls: Counter[str] = Counter()
+        self.stream = SimpleNamespace(
+            user_id="1234",
+            user_login=login.lower(),
+            user_name=login,
+            title="Benchmark stream",
+            game_name="Just Chatting",
+            viewer_count=1234,
+            started_at=datetime.now(timezone.utc),
+            thumbnail_url="https://example.invalid/{width}x{height}.jpg",
+        )
+        self.user = SimpleNamespace(id="1234", profile_image_url="https://example.invalid/pfp.png")
+        self.video = SimpleNamespace(url="https://example.invalid/videos/1")
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls.values())
+
+    def reset(self) -> None:
+        self.calls.clear()
+
+    async def get_streams(
+        self, user_login: list[str] | None = None, user_id: list[str] | None = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        self.calls["streams"] += 1
+        logins = [login.lower() for login in user_login or []]
+        if self.online and (
+            self.login.lower() in logins or self.stream.user_id in (user_id or [])
+        ):
+            yield self.stream
+
+    async def get_users(self, logins: list[str], **kwargs: Any) -> AsyncIterator[Any]:
+        self.calls["users"] += 1
+        yield self.user
+
+    async def get_videos(self, **kwargs: Any) -> AsyncIterator[Any]:
+        self.calls["videos"] += 1
+        yield self.video
+
+
+###########################################################################
+# Rate-limited HTTP stand-in
+###########################################################################
+# Path segment -> name of the id that follows it in discord.py's route templates.
+_SEGMENT_IDS = {
+    "channels": "channel_id",
+    "messages": "message_id",
+    "guilds": "guild_id",
+    "members": "user_id",
+    "roles": "role_id",
+    "reactions": "emoji",
+}
+
+# Route template -> (requests, per seconds) for each channel or guild, roughly what Discord
+# sends back in its X-RateLimit headers. Only routes with a tighter limit than the default are
+# listed; opening a DM has no per-route limit worth modelling, and each DM is its own channel.
+ROUTE_LIMITS: dict[str, tuple[int, float]] = {
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me": (1, 0.25),
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{member_id}": (1, 0.25),
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}": (1, 0.25),
+    "/channels/{channel_id}/messages/{message_id}/reactions": (1, 0.25),
+    "/guilds/{guild_id}/members/{user_id}/roles/{role_id}": (10, 1.0),
+    "/channels/{channel_id}/messages": (5, 5.0),
+    "/channels/{channel_id}/messages/{message_id}": (5, 1.0),
+}
+DEFAULT_LIMIT = (50, 1.0)
+_LIMITED = "You are being rate limited."
+GLOBAL_LIMIT = (50, 1.0)
+
+
+def route_template(path: str) -> tuple[str, dict[str, str]]:
+    """Turns /channels/1/messages/2 into /channels/{channel_id}/messages/{message_id}."""
+    parts = path.strip("/").split("/")
+    template: list[str] = []
+    params: dict[str, str] = {}
+    previous = ""
+    for part in parts:
+        if previous == "{emoji}":
+            if part == "@me":
+                template.append(part)
+            else:
+                template.append("{member_id}")
+                params["member_id"] = part
+        elif previous in _SEGMENT_IDS and part != "@me":
+            name = _SEGMENT_IDS[previous]
+            template.append("{" + name + "}")
+            params[name] = part
+        else:
+            template.append(part)
+        previous = template[-1]
+    return "/" + "/".join(template), params
+
+
+def _json(payload: Any, status: int, headers: dict[str, str]) -> web.Response:
+    # discord.py only decodes bodies whose content type is exactly application/json.
+    return web.Response(
+        body=json.dumps(payload).encode(),
+        status=status,
+        headers={**headers, "Content-Type": "application/json"},
+    )
+
+
+class _Window:
+    """Fixed window that allows limit requests and then refuses until it resets."""
+
+    __slots__ = ("limit", "per", "remaining", "reset_at")
+
+    def __init__(self, limit: int, per: float) -> None:
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now: float) -> float:
+        """Consumes a request and returns 0, or returns how long until one is allowed."""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining == 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return 0.0
+
+
+class RateLimitedDiscordServer:
+    """Local HTTP server that speaks enough of Discord's REST API for the cogs.
+
+    Responses come from a FakeDiscordAPI, each route/channel or route/guild pair has its own
+    window and all routes share a global one. Over-limit requests get a 429 with the same
+    headers and body Discord sends, so discord.py's own bucket handling and retries run.
+    rtt delays every response to stand in for network latency."""
+
+    def __init__(self, api: FakeDiscordAPI, rtt: float = 0.03) -> None:
+        self.api = api
+        self.rtt = rtt
+        self.limited: Counter[str] = Counter()
+        self._windows: dict[tuple[str, str], _Window] = {}
+        self._global = _Window(*GLOBAL_LIMIT)
+        self._runner: web.AppRunner | None = None
+        self.base = ""
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("*", "/api/v10/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base = f"http://127.0.0.1:{port}/api/v10"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def install(self) -> None:
+        """Points discord.py's REST routes at this server."""
+        Route.BASE = self.base
+
+    def _headers(self, window: _Window, bucket: str, now: float) -> dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(window.limit),
+            "X-RateLimit-Remaining": str(window.remaining),
+            "X-RateLimit-Reset": f"{time.time() + window.reset_at - now:.3f}",
+            "X-RateLimit-Reset-After": f"{window.reset_at - now:.3f}",
+            "X-RateLimit-Bucket": bucket,
+        }
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        await asyncio.sleep(self.rtt)
+
+        template, params = route_template("/" + request.match_info["path"])
+        route = Route(request.method, template, **params)
+        major = params.get("channel_id") or params.get("guild_id") or ""
+        bucket = hashlib.md5(template.encode()).hexdigest()[:12]
+
+        window = self._windows.get((template, major))
+        if window is None:
+            window = self._windows[(template, major)] = _Window(
+                *ROUTE_LIMITS.get(template, DEFAULT_LIMIT)
+            )
+
+        now = time.monotonic()
+        global_wait = self._global.take(now)
+        if global_wait:
+            self.limited["global"] += 1
+            return _json(
+                {"message": _LIMITED, "retry_after": global_wait, "global": True},
+                429,
+                {"X-RateLimit-Global": "true", "X-RateLimit-Scope": "global"},
+            )
+
+        wait = window.take(now)
+        headers = self._headers(window, bucket, now)
+        if wait:
+            self.limited[route.key] += 1
+            headers["X-RateLimit-Scope"] = "user"
+            headers["Retry-After"] = f"{wait:.3f}"
+            return _json(
+                {"message": _LIMITED, "retry_after": wait, "global": False},
+                429,
+                headers,
+            )
+
+        body = await request.json() if request.can_read_body else {}
+        payload = self.api.respond(route, {"json": body, "params": dict(request.query)})
+        self.api.calls[route.key] += 1
+        if payload is None:
+            return web.Response(status=204, headers=headers)
+        return _json(payload, 200, headers)
@@ -0,0 +1,307 @@
+"""Runs the offline benchmarks and compares them with the saved baselines.
+
+    python -m benchmarks.run                 # run everything, compare with baselines.json
+    python -m benchmarks.run --save          # run everything and overwrite the baselines
+    python -m benchmarks.run stream_online   # run some scenarios
+    python -m benchmarks.run --wall          # also fail on wall time growth
+
+Wall time is measured without tracing; allocations come from one extra traced run. Request
+counts and allocations are compared by default since they barely depend on the machine; wall
+times are absolute and only mean something against baselines saved on the same machine, so
+they are compared only with --wall."""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable
+
+from benchmarks.world import World
+from donkeybot.helpers.auth_helper import is_admin, is_admin_user
+from donkeybot.helpers.json_helper import JsonHelper
+from donkeybot.helpers.state_helper import ReactionMenu, decode_reactions, save_reactions
+from donkeybot.helpers.twitch_helper import TwitchHelper
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+Step = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    setup: Step
+    run: Step
+
+
+@dataclass
+class Result:
+    wall_ms: float
+    rest_calls: int
+    twitch_calls: int
+    alloc_kib: float
+
+
+###########################################################################
+# Scenarios
+###########################################################################
+def scenarios(world: World) -> list[Scenario]:
+    streaming = world.streaming
+    roles = world.roles
+    twitch = world.twitch
+
+    async def tick() -> None:
+        # Every tick should pay for its own Helix lookup rather than hit the shared cache.
+        TwitchHelper._streams.clear()
+        await streaming.stream_loop()
+
+    async def going_live() -> None:
+        streaming.live.clear()
+        twitch.online = True
+
+    async def steady() -> None:
+        twitch.online = True
+        if not streaming.live:
+            await tick()
+
+    async def going_offline() -> None:
+        await steady()
+        twitch.online = False
+        for stream in streaming.live.values():
+            stream.check = world.config.ttv_timeout
+
+    async def restarted() -> None:
+        # Live with announcements in every guild, one of which lost its embed while down.
+        await going_live()
+        await tick()
+        posts = next(iter(streaming.live.values())).posts
+        guild_id, post = next(iter(posts.items()))
+        channel_id = world.config.guilds[guild_id].stream_channel
+        if post.embed in world.api.messages.get(channel_id, []):
+            world.api.messages[channel_id].remove(post.embed)
+
+    async def reconcile() -> None:
+        TwitchHelper._streams.clear()
+        await streaming.reconcile()
+
+    members = [(g, user_id) for g in world.guilds for user_id in g.members]
+
+    async def reaction_burst() -> None:
+        await asyncio.gather(
+            *(roles.on_raw_reaction_add(world.reaction(g, user_id)) for g, user_id in members)
+        )
+
+    async def untracked_reactions() -> None:
+        await asyncio.gather(
+            *(
+                roles.on_raw_reaction_add(world.reaction(g, user_id, message_id=1, emoji="👍"))
+                for g, user_id in members
+            )
+        )
+
+    async def admin_checks() -> None:
+        predicate = is_admin()(_command).__discord_app_commands_checks__[0]
+        for g in world.guilds:
+            guild = world.guild(g)
+            for user_id in g.members:
+                member = guild.get_member(user_id)
+                assert member is not None
+                await is_admin_user(member, world.bot)
+            for user_id in g.admins:
+                interaction = _Interaction(world.bot, guild, guild.get_member(user_id))
+                await predicate(interaction)
+
+    reminders = {
+        str(i): {
+            "user_id": 1000 + i,
+            "channel_id": 2000 + i % 50,
+            "message": "stretch and drink some water " * 3,
+            "due": time.time() + i,
+            "created": time.time(),
+        }
+        for i in range(2000)
+    }
+    path = world.config.path("reminders.json")
+
+    async def persistence() -> None:
+        JsonHelper.save_json(reminders, path)
+        JsonHelper.load_json(path)
+
+    menus = {
+        "primary": {
+            900_000_000_000_000_000 + i: ReactionMenu(
+                {
+                    f"<:role{j}:{800_000_000_000_000_000 + j}>": 700_000_000_000_000_000 + i * 8 + j
+                    for j in range(8)
+                }
+            )
+            for i in range(500)
+        }
+    }
+    menus_path = world.config.path("reactions.json")
+
+    async def menu_persistence() -> None:
+        save_reactions(menus, menus_path)
+        decode_reactions(JsonHelper.load_json(menus_path))
+
+    async def nothing() -> None:
+        pass
+
+    return [
+        Scenario("stream_online", "stream_loop tick that announces a new stream", going_live, tick),
+        Scenario("stream_steady", "stream_loop tick that refreshes live embeds", steady, tick),
+        Scenario(
+            "stream_offline", "stream_loop tick that retires a finished stream", going_offline, tick
+        ),
+        Scenario(
+            "stream_reconcile",
+            "startup reconciliation of live.json with one announcement deleted",
+            restarted,
+            reconcile,
+        ),
+        Scenario(
+            "reaction_burst",
+            "every member reacts to a role menu at once (includes the 0.5s DM pause)",
+            nothing,
+            reaction_burst,
+        ),
+        Scenario(
+            "reaction_untracked",
+            "every member reacts to a message that is not a role menu",
+            nothing,
+            untracked_reactions,
+        ),
+        Scenario(
+            "is_admin", "is_admin_user for every member plus admin checks", nothing, admin_checks
+        ),
+        Scenario("json_persistence", "save and reload 2000 reminders", nothing, persistence),
+        Scenario(
+            "menu_persistence",
+            "save and reload 500 role menus of 8 reactions",
+            nothing,
+            menu_persistence,
+        ),
+    ]
+
+
+def _command() -> None:
+    pass
+
+
+class _Interaction:
+    def __init__(self, client, guild, user) -> None:
+        self.client = client
+        self.guild = guild
+        self.user = user
+
+
+###########################################################################
+# Measurement
+###########################################################################
+async def measure(world: World, scenario: Scenario, iterations: int) -> Result:
+    walls: list[float] = []
+    rest = twitch = 0
+    for _ in range(iterations):
+        await scenario.setup()
+        world.api.reset()
+        world.twitch.reset()
+
+        start = time.perf_counter()
+        await scenario.run()
+        walls.append(time.perf_counter() - start)
+
+        rest, twitch = world.api.total, world.twitch.total
+
+    await scenario.setup()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await scenario.run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    walls.sort()
+    return Result(
+        wall_ms=round(walls[len(walls) // 2] * 1000, 3),
+        rest_calls=rest,
+        twitch_calls=twitch,
+        alloc_kib=round((peak - before) / 1024, 1),
+    )
+
+
+def compare(
+    name: str, result: Result, baseline: dict | None, tolerance: float, wall: bool
+) -> list[str]:
+    """Returns a line per metric that regressed against the baseline."""
+    if baseline is None:
+        return []
+
+    regressions = []
+    for metric in ("rest_calls", "twitch_calls"):
+        if getattr(result, metric) > baseline.get(metric, float("inf")):
+            regressions.append(f"{name}: {metric} {baseline[metric]} -> {getattr(result, metric)}")
+    for metric in ("wall_ms", "alloc_kib") if wall else ("alloc_kib",):
+        limit = baseline.get(metric, float("inf")) * (1 + tolerance)
+        if getattr(result, metric) > limit:
+            regressions.append(f"{name}: {metric} {baseline[metric]} -> {getattr(result, metric)}")
+    return regressions
+
+
+async def run(names: list[str], iterations: int) -> dict[str, Result]:
+    with tempfile.TemporaryDirectory() as state_dir:
+        world = World(state_dir)
+        await world.load_streaming()
+
+        selected = [s for s in scenarios(world) if not names or s.name in names]
+        results = {}
+        for scenario in selected:
+            results[scenario.name] = await measure(world, scenario, iterations)
+            print(f"  {scenario.name:<20} {scenario.description}", file=sys.stderr)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help="scenario names; all when omitted")
+    parser.add_argument("-n", "--iterations", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="overwrite the saved baselines")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.3, help="allowed wall/alloc growth (default 0.3)"
+    )
+    parser.add_argument(
+        "--wall", action="store_true", help="also compare wall times (same machine only)"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.scenarios, args.iterations))
+
+    baselines: dict[str, dict] = {}
+    if os.path.exists(BASELINES):
+        baselines = JsonHelper.load_json(BASELINES)
+
+    print(f"{'scenario':<20} {'wall ms':>10} {'rest':>6} {'twitch':>6} {'alloc KiB':>10}")
+    regressions: list[str] = []
+    for name, result in results.items():
+        print(
+            f"{name:<20} {result.wall_ms:>10.3f} {result.rest_calls:>6} "
+            f"{result.twitch_calls:>6} {result.alloc_kib:>10.1f}"
+        )
+        regressions += compare(name, result, baselines.get(name), args.tolerance, args.wall)
+
+    if args.save:
+        baselines.update({name: asdict(result) for name, result in results.items()})
+        with open(BASELINES, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=4, sort_keys=True)
+        print(f"Saved baselines to {BASELINES}")
+    elif regressions:
+        print("Regressions against baselines:", *regressions, sep="\n  ")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""Replays a reaction storm against RoleCog over a rate-limited local Discord API.
+
+    python -m benchmarks.storm                                   # 20 reactions/s for 5s
+    python -m benchmarks.storm --rate 200 --duration 5 --users 2000 --distribution zipf
+
+Events arrive as a Poisson process. Each one runs in its own task like discord.py's
+dispatch does, and its latency runs from arrival to the listener returning. REST calls go
+through the bot's REST scheduler and discord.py's real HTTP client, so priority queueing,
+bucket queues and 429 retries are all included.
+
+--duration is the window in which events are sent, not the run time: the run ends once every
+event sent in it has been handled, so a backlog makes it run longer."""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from dataclasses import dataclass, field
+
+from benchmarks.fakes import RateLimitedDiscordServer
+from benchmarks.world import GuildFixture, World
+from donkeybot.helpers.rest_helper import Priority
+
+
+@dataclass
+class StormStats:
+    latencies: list[float] = field(default_factory=list)
+    in_flight: list[int] = field(default_factory=list)
+    http_queued: list[int] = field(default_factory=list)
+    scheduled: list[int] = field(default_factory=list)
+    errors: int = 0
+    events: int = 0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class ReactionStorm:
+    """Generates reaction add and clear events for one role menu per guild."""
+
+    def __init__(
+        self,
+        world: World,
+        rate: float,
+        duration: float,
+        users: int,
+        distribution: str,
+        clear_ratio: float,
+    ) -> None:
+        self.world = world
+        self.rate = rate
+        self.duration = duration
+        self.distribution = distribution
+        self.clear_ratio = clear_ratio
+        self.random = world.random
+        self.stats = StormStats()
+        self._tasks: set[asyncio.Task] = set()
+
+        population = [(g, user_id) for g in world.guilds for user_id in g.members]
+        self.population = population[:users]
+        # Zipf-like weights: a few members toggle roles far more often than the rest.
+        self.weights = (
+            [1 / (rank + 1) for rank in range(len(self.population))]
+            if distribution == "zipf"
+            else None
+        )
+
+    def _pick(self) -> tuple[GuildFixture, int]:
+        if self.weights is None:
+            return self.random.choice(self.population)
+        return self.random.choices(self.population, weights=self.weights)[0]
+
+    async def _handle(self, coro, arrived: float) -> None:
+        try:
+            await coro
+        except Exception:
+            self.stats.errors += 1
+        finally:
+            self.stats.latencies.append(time.perf_counter() - arrived)
+
+    def _dispatch(self) -> None:
+        g, user_id = self._pick()
+        message_id = next(iter(g.menus))
+        roles = self.world.roles
+        if self.random.random() < self.clear_ratio:
+            coro = roles.on_raw_reaction_clear(self.world.reaction_clear(g, message_id))
+        else:
+            coro = roles.on_raw_reaction_add(self.world.reaction(g, user_id, message_id))
+
+        task = asyncio.create_task(self._handle(coro, time.perf_counter()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.stats.events += 1
+
+    async def _sample(self) -> None:
+        http = self.world.bot.http
+        rest = self.world.bot.rest
+        while True:
+            self.stats.scheduled.append(sum(rest.depth(p) for p in Priority))
+            self.stats.in_flight.append(len(self._tasks))
+            self.stats.http_queued.append(
+                sum(len(bucket._pending_requests) for bucket in http._buckets.values())
+            )
+            await asyncio.sleep(0.05)
+
+    async def run(self) -> None:
+        sampler = asyncio.create_task(self._sample())
+        deadline = time.perf_counter() + self.duration
+        while time.perf_counter() < deadline:
+            self._dispatch()
+            await asyncio.sleep(self.random.expovariate(self.rate))
+
+        await asyncio.gather(*self._tasks)
+        sampler.cancel()
+
+
+def report(storm: ReactionStorm, server: RateLimitedDiscordServer, elapsed: float) -> None:
+    stats = storm.stats
+    rest = storm.world.api.total
+    limited = sum(server.limited.values())
+    print(f"events           {stats.events} in {elapsed:.1f}s ({stats.events / elapsed:.1f}/s)")
+    print(f"errors           {stats.errors}")
+    print(
+        "latency ms       "
+        + "  ".join(
+            f"p{pct}={percentile(stats.latencies, pct) * 1000:.0f}" for pct in (50, 90, 99)
+        )
+        + f"  max={max(stats.latencies, default=0) * 1000:.0f}"
+    )
+    print(
+        f"in-flight        max={max(stats.in_flight, default=0)}"
+        f"  p90={percentile([float(n) for n in stats.in_flight], 90):.0f}"
+    )
+    print(
+        f"http queued      max={max(stats.http_queued, default=0)}"
+        f"  p90={percentile([float(n) for n in stats.http_queued], 90):.0f}"
+    )
+    print(
+        f"scheduler queued max={max(stats.scheduled, default=0)}"
+        f"  p90={percentile([float(n) for n in stats.scheduled], 90):.0f}"
+    )
+    for line in storm.world.bot.rest.describe().splitlines():
+        print(f"  {line}")
+    print(f"rest calls       {rest} ({rest / max(stats.events, 1):.2f}/event), {limited} x 429")
+    for key, count in storm.world.api.calls.most_common():
+        print(f"  {count:>6}  {key}  ({server.limited.get(key, 0)} limited)")
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    # discord.py logs every 429 it retries; the report counts them instead.
+    logging.getLogger("discord.http").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        world = World(
+            state_dir,
+            guilds=args.guilds,
+            members=max(1, args.users // args.guilds),
+            seed=args.seed,
+            fake_http=False,
+        )
+        server = RateLimitedDiscordServer(world.api, rtt=args.rtt)
+        await server.start()
+        server.install()
+        # Only open the HTTP session; Client.login would also run setup_hook.
+        await world.bot.http.static_login("storm")
+        try:
+            storm = ReactionStorm(
+                world, args.rate, args.duration, args.users, args.distribution, args.clear_ratio
+            )
+            world.api.reset()
+            start = time.perf_counter()
+            await storm.run()
+            report(storm, server, time.perf_counter() - start)
+        finally:
+            await world.bot.http.close()
+            await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20, help="reactions per second")
+    parser.add_argument("--duration", type=float, default=5, help="seconds to send events for")
+    parser.add_argument("--users", type=int, default=200, help="members reacting")
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--distribution", choices=("uniform", "zipf"), default="uniform")
+    parser.add_argument("--clear-ratio", type=float, default=0.0, help="share of clear events")
+    parser.add_argument("--rtt", type=float, default=0.03, help="simulated API latency (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
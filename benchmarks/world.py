@@ -0,0 +1,190 @@
+"""Builds a DonkeyBot with cached guilds and loaded cogs whose I/O goes to the fakes."""
+
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Any
+
+import discord
+
+from benchmarks.fakes import (
+    FakeDiscordAPI,
+    FakeTwitch,
+    guild_payload,
+    member_payload,
+    snowflake,
+)
+from donkeybot.helpers.config_helper import BotConfig
+from donkeybot.helpers.state_helper import ReactionMenu
+from donkeybot.main import DonkeyBot
+from donkeybot.modules.roleassigner import RoleCog
+from donkeybot.modules.streaming import StreamingCog
+
+EMOJIS = ("🍎", "🍌", "🍇", "🍉", "🍒", "🥝", "🍍", "🥥")
+
+
+@dataclass
+class GuildFixture:
+    guild_id: int
+    stream_channel: int
+    stream_thread: int
+    role_channel: int
+    admin_role: int
+    stream_role: int
+    # message id -> emoji -> role id
+    menus: dict[int, dict[str, int]]
+    members: list[int] = field(default_factory=list)
+    admins: list[int] = field(default_factory=list)
+
+
+class World:
+    """A bot with guilds, members and reaction menus whose REST and Helix calls are faked."""
+
+    def __init__(
+        self,
+        state_dir: str,
+        guilds: int = 3,
+        members: int = 200,
+        menus: int = 2,
+        seed: int = 0,
+        fake_http: bool = True,
+    ) -> None:
+        """fake_http answers REST calls in-process; without it they need a server to go to."""
+        self.random = random.Random(seed)
+        self.api = FakeDiscordAPI()
+        self.twitch = FakeTwitch("BenchStreamer")
+        self.guilds = [self._guild_fixture(members, menus) for _ in range(guilds)]
+
+        self.config = BotConfig(
+            name="Benchmark",
+            env="dev",
+            discord_key="",
+            state_dir=state_dir,
+            streamer=self.twitch.login,
+            ttv_id="",
+            ttv_token="",
+            ttv_timeout=5,
+            ttv_schedule_enabled=False,
+            ttv_schedule_start=0,
+            ttv_schedule_end=24,
+            channels={
+                "dev": {
+                    str(g.guild_id): {
+                        "stream": {"main": g.stream_channel, "thread": g.stream_thread}
+                    }
+                    for g in self.guilds
+                }
+            },
+            live={},
+            reactions={
+                "dev": {
+                    message_id: ReactionMenu(dict(menu))
+                    for g in self.guilds
+                    for message_id, menu in g.menus.items()
+                }
+            },
+            reminders={},
+            roles={
+                "dev": {
+                    str(g.guild_id): {
+                        "admin": {"admin": g.admin_role, "stream": g.stream_role},
+                        "mods": {},
+                    }
+                    for g in self.guilds
+                }
+            },
+            statuses=["benchmarking"],
+        )
+
+        self.bot = DonkeyBot(self.config)
+        # Per-tick info logs would dominate the timings and bury the report.
+        logging.getLogger(self.config.name).setLevel(logging.WARNING)
+        if fake_http:
+            self.api.install(self.bot)
+        for g in self.guilds:
+            self._cache_guild(g)
+
+        self.streaming = StreamingCog(self.bot)
+        self.streaming.ttv_client = self.twitch  # type: ignore[assignment]
+        self.roles = RoleCog(self.bot)
+
+    def _guild_fixture(self, members: int, menus: int) -> GuildFixture:
+        fixture = GuildFixture(
+            guild_id=snowflake(),
+            stream_channel=snowflake(),
+            stream_thread=snowflake(),
+            role_channel=snowflake(),
+            admin_role=snowflake(),
+            stream_role=snowflake(),
+            menus={
+                snowflake(): {emoji: snowflake() for emoji in EMOJIS[:4]} for _ in range(menus)
+            },
+        )
+        fixture.members = [snowflake() for _ in range(members)]
+        fixture.admins = fixture.members[: max(1, members // 20)]
+        for channel_id in (fixture.stream_channel, fixture.stream_thread, fixture.role_channel):
+            self.api.channels[channel_id] = fixture.guild_id
+        return fixture
+
+    def _cache_guild(self, g: GuildFixture) -> None:
+        admins = set(g.admins)
+        menu_roles = [role for menu in g.menus.values() for role in menu.values()]
+        members: list[dict[str, Any]] = []
+        for user_id in g.members:
+            roles = [g.admin_role] if user_id in admins else []
+            roles += self.random.sample(menu_roles, k=min(2, len(menu_roles)))
+            payload = member_payload(user_id, roles)
+            self.api.members[user_id] = payload
+            members.append(payload)
+
+        self.bot._connection._add_guild_from_data(
+            guild_payload(
+                g.guild_id,
+                [g.stream_channel, g.stream_thread, g.role_channel],
+                [g.admin_role, g.stream_role, *menu_roles],
+                members,
+            )  # type: ignore[arg-type]
+        )
+
+    async def load_streaming(self) -> None:
+        """Resolves each guild's stream channels the way cog_load does, without the loop."""
+        for guild in self.config.guilds.values():
+            self.streaming.targets[guild.guild_id] = await self.streaming._fetch_target(guild)
+
+    def guild(self, g: GuildFixture) -> discord.Guild:
+        guild = self.bot.get_guild(g.guild_id)
+        assert guild is not None
+        return guild
+
+    def reaction(
+        self, g: GuildFixture, user_id: int, message_id: int | None = None, emoji: str | None = None
+    ) -> discord.RawReactionActionEvent:
+        """Builds the event the gateway sends when user_id reacts to a menu in g."""
+        if message_id is None:
+            message_id = self.random.choice(list(g.menus))
+        if emoji is None:
+            emoji = self.random.choice(list(g.menus.get(message_id, {"❓": 0})))
+
+        payload = discord.RawReactionActionEvent(
+            {
+                "message_id": str(message_id),
+                "channel_id": str(g.role_channel),
+                "guild_id": str(g.guild_id),
+                "user_id": str(user_id),
+                "type": 0,
+                "burst": False,
+            },  # type: ignore[typeddict-item]
+            discord.PartialEmoji(name=emoji),
+            "REACTION_ADD",
+        )
+        payload.member = self.guild(g).get_member(user_id)
+        return payload
+
+    def reaction_clear(self, g: GuildFixture, message_id: int) -> discord.RawReactionClearEvent:
+        return discord.RawReactionClearEvent(
+            {
+                "message_id": str(message_id),
+                "channel_id": str(g.role_channel),
+                "guild_id": str(g.guild_id),
+            }
+        )
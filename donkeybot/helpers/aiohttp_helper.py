@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import Any
 
 import aiohttp
+from discord.http import HTTPClient
 
 
 @dataclass
@@ -14,6 +15,33 @@ class AIOHTTPResponse:
         return 200 <= self.status < 300
 
 
+def share_connector(http: HTTPClient) -> None:
+    """Makes the session discord.py opens on login leave its connector open when it closes,
+    as if it had been created with connector_owner=False, so several bots can share one pool.
+
+    Neither library exposes this, so it relies on private attributes of the discord.py and
+    aiohttp versions pinned in requirements.txt and raises RuntimeError if they are gone."""
+    if not hasattr(http, "_HTTPClient__session") or "_connector_owner" not in getattr(
+        aiohttp.ClientSession, "ATTRS", ()
+    ):
+        raise RuntimeError(
+            "This discord.py or aiohttp version has no HTTPClient.__session or "
+            "ClientSession._connector_owner; update share_connector for it"
+        )
+    static_login = http.static_login
+
+    async def login(token: str) -> Any:
+        try:
+            return await static_login(token)
+        finally:
+            # discord.py builds the session inside static_login without a connector_owner option.
+            session: aiohttp.ClientSession | None = getattr(http, "_HTTPClient__session", None)
+            if session is not None:
+                session._connector_owner = False
+
+    http.static_login = login  # type: ignore[method-assign]
+
+
 class AIOHTTPHelper:
     _session: aiohttp.ClientSession | None = None
 
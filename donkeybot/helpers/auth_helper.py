@@ -17,16 +17,17 @@ def is_admin():
         if guild is None:
             raise CheckFailure()
 
-        if interaction.user == guild.owner:
+        if interaction.user.id == guild.owner_id:
             return True
 
-        member = guild.get_member(interaction.user.id)
+        member = interaction.user
+        if not isinstance(member, Member):
+            member = guild.get_member(interaction.user.id)
         if member is None:
             raise CheckFailure()
 
-        for role in member.roles:
-            if role.id in list(bot.roles.get("admin", {}).values()):
-                return True
+        if await is_admin_user(member, bot):
+            return True
 
         raise CheckFailure()
 
@@ -35,11 +36,11 @@ def is_admin():
 
 async def is_admin_user(user: Member, bot: "DonkeyBot") -> bool:
     """Returns True if the user is the owner or has an admin/mod role."""
-    if user.guild.owner is not None and user == user.guild.owner:
+    if user.id == user.guild.owner_id:
         return True
 
-    for role in user.roles:
-        if role.id in list(bot.roles.get("admin", {}).values()):
-            return True
+    guild_config = bot.config.guilds.get(user.guild.id)
+    if guild_config is None:
+        return False
 
-    return False
+    return any(role.id in guild_config.admin_roles for role in user.roles)
@@ -1,11 +1,117 @@
 import os
+from bisect import bisect_left, bisect_right
+from typing import Callable, Hashable, Iterable
 
 from discord import Interaction, app_commands
 
+_SEPARATORS = (" ", "_", "-", ".")
+
+
+class AutocompleteIndex:
+    """Sorted, casefolded copy of a set of names for ranked autocomplete lookups.
+
+    The index is rebuilt only after invalidate() or when stamp() changes, e.g. a directory's
+    mtime, so keystrokes never touch the source. Prefix matches come from a binary search;
+    substring matches come from str.find over all keys joined into one string, and only
+    when prefixes do not fill the results."""
+
+    def __init__(
+        self,
+        source: Callable[[], Iterable[str]],
+        stamp: Callable[[], Hashable] | None = None,
+    ) -> None:
+        self.source = source
+        self.stamp = stamp
+        self._stamp: Hashable = None
+        self._dirty = True
+        self._keys: list[str] = []
+        self._names: list[str] = []
+        self._joined = ""
+        self._starts: list[int] = []
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def _refresh(self) -> None:
+        if self.stamp is not None:
+            stamp = self.stamp()
+            if stamp != self._stamp:
+                self._stamp = stamp
+                self._dirty = True
+        if not self._dirty:
+            return
+
+        entries = sorted({(name.casefold(), name) for name in self.source()})
+        self._keys = [key for key, _ in entries]
+        self._names = [name for _, name in entries]
+        self._joined = "\n".join(self._keys)
+        self._starts = []
+        offset = 0
+        for key in self._keys:
+            self._starts.append(offset)
+            offset += len(key) + 1
+        self._dirty = False
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._names)
+
+    def search(self, current: str, limit: int = 25) -> list[str]:
+        """Returns up to limit names: exact, prefix, word-start and then substring matches."""
+        self._refresh()
+        query = current.casefold().strip().replace("\n", " ")
+        if not query:
+            return self._names[:limit]
+
+        keys = self._keys
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and end - start < limit and keys[end].startswith(query):
+            end += 1
+        results = list(range(start, end))
+        if len(results) >= limit:
+            return [self._names[i] for i in results]
+
+        # Rank the remaining matches by where the query starts, preferring word boundaries.
+        joined, starts = self._joined, self._starts
+        ranked: list[tuple[int, int, int]] = []
+        found = joined.find(query)
+        while found != -1:
+            i = bisect_right(starts, found) - 1
+            position = found - starts[i]
+            if position > 0:
+                boundary = 0 if keys[i][position - 1] in _SEPARATORS else 1
+                ranked.append((boundary, position, i))
+            # Continue from the next key; the first match in each key ranks best.
+            found = joined.find(query, starts[i + 1]) if i + 1 < len(starts) else -1
+        ranked.sort()
+        results.extend(i for _, _, i in ranked[: limit - len(results)])
+        return [self._names[i] for i in results]
+
+
+def choices(names: Iterable[str]) -> list[app_commands.Choice[str]]:
+    """Turns names into choices, trimmed to Discord's 100 character limit."""
+    return [app_commands.Choice(name=name[:100], value=name[:100]) for name in names]
+
+
+def _dir_mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _list_dir(path: str) -> list[str]:
+    try:
+        return [name for name in os.listdir(path) if not name.startswith(".")]
+    except FileNotFoundError:
+        return []
+
+
+PFP_INDEX = AutocompleteIndex(lambda: _list_dir("pfps/"), lambda: _dir_mtime("pfps/"))
+
 
 async def get_pfp_filenames(
     interaction: Interaction, current: str
 ) -> list[app_commands.Choice[str]]:
-    pfps = os.listdir("pfps/")
-    matches = [f for f in pfps if current.lower() in f.lower()]
-    return [app_commands.Choice(name=m, value=m) for m in matches[:25]]
+    return choices(PFP_INDEX.search(current))
@@ -1,39 +1,219 @@
 import os
+from dataclasses import dataclass, field
+from typing import Any, Mapping
 
 from dotenv import load_dotenv
 
 from donkeybot.helpers.json_helper import JsonHelper
+from donkeybot.helpers.setup_json import setup_json
+from donkeybot.helpers.state_helper import (
+    LiveStream,
+    ReactionMenu,
+    decode_live,
+    decode_reactions,
+)
 
 load_dotenv()
 
-ENV: str = "primary" if os.getenv("DEBUG") == "False" else "dev"
+# Process-wide settings, read from the process environment. Under the runner that is the
+# shared env file; per-bot settings such as SENTRY_SDK, MEMORY_PROFILE and DEDUPE_* are read
+# from each bot's own env file by BotConfig.from_env instead.
+SENTRY_TRACES_RATE: float = float(os.getenv("SENTRY_TRACES_RATE", "0.05"))
+SENTRY_TRACES_RATES: str = os.getenv("SENTRY_TRACES_RATES", "")
+SENTRY_ERROR_WINDOW: float = float(os.getenv("SENTRY_ERROR_WINDOW", "600"))
 
-CHANNELS_LIST: dict[str, dict] = JsonHelper.load_json("json/channels.json")
-LIVE_LIST: dict[str, dict] = JsonHelper.load_json("json/live.json")
-REACTIONS_LIST: dict[str, dict] = JsonHelper.load_json("json/reactions.json")
-REMINDER_LIST: dict[str, dict] = JsonHelper.load_json("json/reminders.json")
-ROLES_LIST: dict[str, dict] = JsonHelper.load_json("json/roles.json")
-STATUSES_LIST: list[str] = JsonHelper.load_json("json/statuses.json")
+METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
 
-GUILD_ID: int = int(CHANNELS_LIST[ENV]["server"])
-STREAM_CHANNEL: int = int(CHANNELS_LIST[ENV]["stream"]["main"])
-STREAM_OFF_THREAD: int = int(CHANNELS_LIST[ENV]["stream"]["thread"])
+LOOP_LAG_THRESHOLD: float = float(os.getenv("LOOP_LAG_THRESHOLD", "0.5"))
 
-SENTRY_SDK: str = os.getenv("SENTRY_SDK", "")
+# Seconds a shutdown waits for in-flight reactions, reminders and stream ticks to finish.
+# Keep it below the container's stop_grace_period so state is flushed before SIGKILL.
+SHUTDOWN_GRACE: float = float(os.getenv("SHUTDOWN_GRACE", "20"))
 
-TTV_TOKEN: str = os.getenv("TWITCH_TOKEN", "")
-TTV_ID: str = os.getenv("TWITCH_ID", "")
-TTV_TIMEOUT: int = int(os.getenv("TTV_TIMEOUT", "5"))
-TTV_SCHEDULE_ENABLED: bool = os.getenv("TTV_SCHEDULE_ENABLED", "True").lower() == "true"
-TTV_SCHEDULE_START: int = int(os.getenv("TTV_SCHEDULE_START", "13"))
-TTV_SCHEDULE_END: int = int(os.getenv("TTV_SCHEDULE_END", "21"))
+LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_HOURS: float = float(os.getenv("LOG_ROTATE_HOURS", "24"))
+LOG_BACKUPS: int = int(os.getenv("LOG_BACKUPS", "14"))
+LOG_RATE_LIMIT: int = int(os.getenv("LOG_RATE_LIMIT", "20"))
 
-BOT: str = os.getenv("BOT_NAME", "DonkeyBot")
+# Twitch lookups younger than this are shared between every bot in the process.
+TTV_CACHE_TTL: float = float(os.getenv("TTV_CACHE_TTL", "45"))
+# Below this share of the Helix points per minute left, stream checks slow to one per
+# TTV_LOW_BUDGET_INTERVAL seconds and VOD lookups wait for the budget to refill.
+TTV_BUDGET_LOW: float = float(os.getenv("TTV_BUDGET_LOW", "0.25"))
+TTV_LOW_BUDGET_INTERVAL: float = float(os.getenv("TTV_LOW_BUDGET_INTERVAL", "180"))
 
-STREAMER: str = os.getenv("STREAMER", "ThreeAlpaca")
 
-DISCORD_KEY: str = (
-    os.getenv("DISCORD_PRIMARY_KEY", "")
-    if os.getenv("DEBUG") == "False"
-    else os.getenv("DISCORD_BETA_KEY", "")
-)
+class ConfigError(ValueError):
+    """Raised for settings that cannot work together."""
+
+
+def parse_shard_ids(value: str) -> list[int] | None:
+    """Parses "0,2,4-7" into shard ids; an empty value means every shard."""
+    ids: list[int] = []
+    for part in value.split(","):
+        first, _, last = part.strip().partition("-")
+        if not first:
+            continue
+        ids.extend(range(int(first), int(last or first) + 1))
+    return sorted(set(ids)) or None
+
+
+@dataclass(slots=True)
+class GuildConfig:
+    """Channels and roles of one guild the bot serves."""
+
+    guild_id: int
+    stream_channel: int
+    stream_thread: int
+    roles: dict[str, dict[str, Any]]
+    admin_roles: frozenset[int] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.admin_roles = frozenset(int(r) for r in self.roles.get("admin", {}).values() if r)
+
+    @property
+    def stream_role(self) -> int:
+        return int(self.roles.get("admin", {}).get("stream", 0))
+
+    @property
+    def streams(self) -> bool:
+        """Whether the guild subscribes to stream notifications."""
+        return bool(self.stream_channel)
+
+
+def build_guilds(channels: dict[str, Any], roles: dict[str, Any]) -> dict[int, GuildConfig]:
+    """Indexes one environment's channels and roles by guild id.
+
+    Both sections are keyed by guild id, e.g. {"<guild id>": {"stream": {...}}}; the older
+    single-guild shape ({"server": ..., "stream": {...}} and a bare roles mapping) is still
+    read, and role groups outside a guild id key apply to every guild without its own entry."""
+    if "server" in channels:
+        channels = {str(channels["server"]): channels}
+    shared_roles = {key: value for key, value in roles.items() if not key.isdigit()}
+
+    guilds: dict[int, GuildConfig] = {}
+    for guild_id, section in channels.items():
+        stream = section.get("stream", {})
+        guilds[int(guild_id)] = GuildConfig(
+            guild_id=int(guild_id),
+            stream_channel=int(stream.get("main", 0)),
+            stream_thread=int(stream.get("thread", 0)),
+            roles=roles.get(str(guild_id), shared_roles),
+        )
+    return guilds
+
+
+@dataclass
+class BotConfig:
+    """Settings and loaded JSON state of one bot; several can share a process."""
+
+    name: str
+    env: str
+    discord_key: str
+    state_dir: str
+    streamer: str
+    ttv_id: str
+    ttv_token: str
+    ttv_timeout: int
+    ttv_schedule_enabled: bool
+    ttv_schedule_start: int
+    ttv_schedule_end: int
+    channels: dict[str, dict]
+    live: dict[str, LiveStream]
+    # env -> message id -> menu
+    reactions: dict[str, dict[int, ReactionMenu]]
+    reminders: dict[str, dict]
+    roles: dict[str, dict]
+    statuses: list[str]
+    # None runs one gateway connection; 0 lets Discord recommend the shard count.
+    shard_count: int | None = None
+    shard_ids: list[int] | None = None
+    # Sentry is set up once per process, by the first primary bot with a DSN.
+    sentry_dsn: str = ""
+    # full: every member cached and chunked at startup. lazy: no startup chunking; only members
+    # who join while the bot is connected are cached, the rest are fetched when needed. lean: no
+    # members intent and no member cache.
+    memory_profile: str = "full"
+    # Role menu reaction events are remembered by gateway delivery for dedupe_ttl seconds, long
+    # enough to span a reconnect and RESUME, and redeliveries skipped; at most dedupe_max are
+    # remembered.
+    dedupe_ttl: float = 120.0
+    dedupe_max: int = 10000
+    guilds: dict[int, GuildConfig] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.guilds = build_guilds(self.channels[self.env], self.roles[self.env])
+        for stream in self.live.values():
+            # Announcements saved before multi-guild support belong to the primary guild.
+            if 0 in stream.posts and self.guilds:
+                stream.posts[self.primary_guild] = stream.posts.pop(0)
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str], state_dir: str = "json/") -> "BotConfig":
+        """Builds a config from environment variables, loading its JSON state from state_dir."""
+        state_dir = env.get("BOT_STATE_DIR", state_dir)
+        setup_json(state_dir)
+
+        def load(filename: str):
+            return JsonHelper.load_json(os.path.join(state_dir, filename))
+
+        shard_count = (
+            int(env["SHARD_COUNT"].replace("auto", "0")) if env.get("SHARD_COUNT") else None
+        )
+        shard_ids = parse_shard_ids(env.get("SHARD_IDS", ""))
+        if shard_ids is not None:
+            # discord.py can only run a subset of shards when it knows how many there are.
+            if not shard_count:
+                raise ConfigError(
+                    "SHARD_IDS needs a fixed SHARD_COUNT; it cannot be combined with an unset "
+                    "or auto SHARD_COUNT"
+                )
+            if shard_ids[-1] >= shard_count:
+                raise ConfigError(
+                    f"SHARD_IDS go up to {shard_ids[-1]} but SHARD_COUNT is {shard_count}"
+                )
+
+        primary = env.get("DEBUG") == "False"
+        return cls(
+            name=env.get("BOT_NAME", "DonkeyBot"),
+            env="primary" if primary else "dev",
+            discord_key=(
+                env.get("DISCORD_PRIMARY_KEY", "")
+                if primary
+                else env.get("DISCORD_BETA_KEY", "")
+            ),
+            state_dir=state_dir,
+            streamer=env.get("STREAMER", "ThreeAlpaca"),
+            ttv_id=env.get("TWITCH_ID", ""),
+            ttv_token=env.get("TWITCH_TOKEN", ""),
+            ttv_timeout=int(env.get("TTV_TIMEOUT", "5")),
+            ttv_schedule_enabled=env.get("TTV_SCHEDULE_ENABLED", "True").lower() == "true",
+            ttv_schedule_start=int(env.get("TTV_SCHEDULE_START", "13")),
+            ttv_schedule_end=int(env.get("TTV_SCHEDULE_END", "21")),
+            channels=load("channels.json"),
+            live=decode_live(load("live.json")),
+            reactions=decode_reactions(load("reactions.json")),
+            reminders=load("reminders.json"),
+            roles=load("roles.json"),
+            statuses=load("statuses.json"),
+            shard_count=shard_count,
+            shard_ids=shard_ids,
+            sentry_dsn=env.get("SENTRY_SDK", ""),
+            memory_profile=env.get("MEMORY_PROFILE", "full").lower(),
+            dedupe_ttl=float(env.get("DEDUPE_TTL", "120")),
+            dedupe_max=int(env.get("DEDUPE_MAX", "10000")),
+        )
+
+    def path(self, filename: str) -> str:
+        """Returns the path of a state file in this bot's state directory."""
+        return os.path.join(self.state_dir, filename)
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_count is not None
+
+    @property
+    def primary_guild(self) -> int:
+        """The first configured guild, which owns state saved before multi-guild support."""
+        return next(iter(self.guilds))
@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from donkeybot.helpers.metrics_helper import DEDUPE_HITS
+
+
+class DedupeCache:
+    """Remembers event keys for ttl seconds so a redelivered event is handled only once.
+
+    Every key lives for the same ttl, so insertion order is expiry order: expired keys are
+    dropped from the front on each check, and the oldest go first once maxsize is reached."""
+
+    def __init__(self, name: str, ttl: float, maxsize: int) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self._expiry: OrderedDict[Hashable, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def seen(self, key: Hashable, event: str) -> bool:
+        """Returns True if key was seen within ttl; otherwise remembers it and returns False."""
+        now = time.monotonic()
+        expiry = self._expiry
+        while expiry:
+            oldest, expires = next(iter(expiry.items()))
+            if expires > now:
+                break
+            del expiry[oldest]
+
+        if key in expiry:
+            self.hits += 1
+            DEDUPE_HITS.inc((self.name, event))
+            return True
+
+        expiry[key] = now + self.ttl
+        if len(expiry) > self.maxsize:
+            expiry.popitem(last=False)
+        return False
+
+    def clear(self) -> None:
+        self._expiry.clear()
+
+    def describe(self) -> str:
+        return f"{self.hits} duplicates skipped, {len(self)} keys tracked"
@@ -4,8 +4,6 @@ from datetime import datetime, timezone
 from discord import Embed
 from dotenv import load_dotenv
 
-from donkeybot.helpers.config_helper import BOT
-
 load_dotenv()
 
 
@@ -18,6 +16,7 @@ class EmbedCreator:
         viewer_count: int,
         twitch_pfp: str | None,
         thumbnail: str,
+        footer: str = "DonkeyBot",
     ) -> Embed:
         """This embed is used to display currently online livestreams."""
         embed = Embed(
@@ -35,7 +34,7 @@ class EmbedCreator:
         embed.add_field(name="Game", value=stream_game, inline=True)
         embed.add_field(name="Viewers", value=viewer_count, inline=True)
         embed.set_image(url=thumbnail)
-        embed.set_footer(text=BOT)
+        embed.set_footer(text=footer)
 
         return embed
 
@@ -45,6 +44,7 @@ class EmbedCreator:
         stream_game: str,
         twitch_pfp: str | None,
         archive_video: str | None,
+        footer: str = "DonkeyBot",
     ) -> Embed:
         """This embed is used to display currently online livestreams."""
         embed = Embed(
@@ -64,6 +64,41 @@ class EmbedCreator:
         if archive_video:
             embed.description = f"Stream VOD: {archive_video}"
 
-        embed.set_footer(text=BOT)
+        embed.set_footer(text=footer)
+
+        return embed
+
+    @staticmethod
+    def diagnostics_embed(fields: dict[str, str], footer: str = "DonkeyBot") -> Embed:
+        """This embed is used to display the bot's runtime diagnostics."""
+        embed = Embed(
+            title=f"{footer} diagnostics",
+            color=random.randint(0, 0xFFFFFF),
+            timestamp=datetime.now(timezone.utc),
+        )
+
+        for name, value in fields.items():
+            embed.add_field(name=name, value=value, inline=True)
+
+        embed.set_footer(text=footer)
+
+        return embed
+
+    @staticmethod
+    def stream_stats_embed(
+        stream_name: str, fields: dict[str, str], footer: str = "DonkeyBot"
+    ) -> Embed:
+        """This embed is used to display a streamer's session statistics."""
+        embed = Embed(
+            title=f"{stream_name} stream stats",
+            url=f"https://twitch.tv/{stream_name}",
+            color=random.randint(0, 0xFFFFFF),
+            timestamp=datetime.now(timezone.utc),
+        )
+
+        for name, value in fields.items():
+            embed.add_field(name=name, value=value, inline=False)
+
+        embed.set_footer(text=footer)
 
         return embed
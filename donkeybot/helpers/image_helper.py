@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from donkeybot.helpers.metrics_helper import IMAGE_RENDER_SECONDS
+
+AVATAR_SIZE = 512
+MAX_BYTES = 8 * 1024 * 1024
+MAX_PIXELS = 4096 * 4096
+FORMATS = {"PNG": "png", "JPEG": "jpg", "GIF": "gif", "WEBP": "webp"}
+
+# Pillow releases the GIL while decoding and resampling, so threads keep the loop free. The
+# workers are module-level functions, so a ProcessPoolExecutor can be passed in instead.
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image")
+
+
+class ImageRejected(ValueError):
+    """Raised for inputs that are too large, not an image, or in an unsupported format."""
+
+
+def _open(data: bytes) -> Image.Image:
+    """Reads only the header and checks size limits before any pixels are decoded."""
+    if len(data) > MAX_BYTES:
+        raise ImageRejected(f"Images must be under {MAX_BYTES // (1024 * 1024)} MiB.")
+    try:
+        image = Image.open(BytesIO(data))
+    except (OSError, Image.DecompressionBombError) as error:
+        raise ImageRejected("That file is not a supported image.") from error
+    if image.format not in FORMATS:
+        raise ImageRejected("Only PNG, JPEG, GIF and WebP images are supported.")
+    if image.width * image.height > MAX_PIXELS:
+        raise ImageRejected(f"Images must be under {MAX_PIXELS:,} pixels.")
+    return image
+
+
+def _render(data: bytes, size: int) -> bytes:
+    """Crops to a centred square, resamples to size x size and encodes a PNG."""
+    image = _open(data)
+    # Lets JPEG decode at a reduced scale instead of full resolution and then shrinking.
+    image.draft("RGB", (size, size))
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+
+    out = BytesIO()
+    image.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+def _write(path: str, data: bytes) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _variant(data: bytes, cache_dir: str, size: int) -> bytes:
+    """Returns the cached rendering of data, rendering and storing it on a miss."""
+    start = time.perf_counter()
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(cache_dir, f"{digest}-{size}.png")
+    try:
+        with open(path, "rb") as f:
+            rendered = f.read()
+        result = "hit"
+    except FileNotFoundError:
+        rendered = _render(data, size)
+        os.makedirs(cache_dir, exist_ok=True)
+        _write(path, rendered)
+        result = "miss"
+    IMAGE_RENDER_SECONDS.observe(time.perf_counter() - start, (result,))
+    return rendered
+
+
+def _variant_file(path: str, cache_dir: str, size: int) -> bytes:
+    if os.path.getsize(path) > MAX_BYTES:
+        raise ImageRejected(f"{os.path.basename(path)} is over {MAX_BYTES} bytes.")
+    with open(path, "rb") as f:
+        return _variant(f.read(), cache_dir, size)
+
+
+def _store(data: bytes, directory: str, name: str, cache_dir: str, size: int) -> str:
+    """Validates data, saves it as directory/name.<ext> and pre-renders its variant."""
+    extension = FORMATS[str(_open(data).format)]
+    filename = f"{name}.{extension}"
+    _write(os.path.join(directory, filename), data)
+    _variant(data, cache_dir, size)
+    return filename
+
+
+class ImagePipeline:
+    """Decodes, resizes and encodes images in an executor and caches the results.
+
+    Variants live in cache_dir named by the SHA-256 of their source and their size, so a
+    renamed or re-added picture reuses its rendering and an edited one gets a new one."""
+
+    def __init__(
+        self,
+        directory: str = "pfps",
+        size: int = AVATAR_SIZE,
+        executor: Executor | None = None,
+    ) -> None:
+        self.directory = directory
+        self.cache_dir = os.path.join(directory, ".rendered")
+        self.size = size
+        self.executor = executor or _EXECUTOR
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    def sources(self) -> list[str]:
+        """Lists the pictures in directory, leaving out the cache."""
+        try:
+            return [n for n in os.listdir(self.directory) if not n.startswith(".")]
+        except FileNotFoundError:
+            return []
+
+    async def render(self, data: bytes) -> bytes:
+        """Returns avatar-ready PNG bytes for data. Raises ImageRejected for bad inputs."""
+        return await self._run(_variant, data, self.cache_dir, self.size)
+
+    async def avatar(self, filename: str) -> bytes:
+        """Returns avatar-ready PNG bytes for a picture in directory."""
+        path = os.path.join(self.directory, os.path.basename(filename))
+        return await self._run(_variant_file, path, self.cache_dir, self.size)
+
+    async def store(self, name: str, data: bytes) -> str:
+        """Adds a new picture under name and returns its filename."""
+        os.makedirs(self.directory, exist_ok=True)
+        return await self._run(
+            _store, data, self.directory, os.path.basename(name), self.cache_dir, self.size
+        )
+
+    async def prerender(self) -> int:
+        """Renders every picture that has no cached variant yet; returns how many failed."""
+        results = await asyncio.gather(
+            *(self.avatar(filename) for filename in self.sources()), return_exceptions=True
+        )
+        return sum(isinstance(result, Exception) for result in results)
@@ -0,0 +1,42 @@
+from discord import Intents, MemberCacheFlags
+
+PROFILES: tuple[str, ...] = ("full", "lazy", "lean")
+
+# Gateway intents each module needs on top of guilds. Modules missing from this table get none.
+MODULE_INTENTS: dict[str, tuple[str, ...]] = {
+    "roleassigner": ("guild_reactions",),
+}
+
+
+def build_intents(modules: list[str], profile: str) -> Intents:
+    """Returns the intents for the given profile; lazy and lean only enable what modules need."""
+    if profile not in ("lazy", "lean"):
+        intents = Intents.default()
+        intents.reactions = True
+        intents.members = True
+        intents.guilds = True
+        return intents
+
+    intents = Intents.none()
+    intents.guilds = True
+    intents.members = profile == "lazy"
+    for module in modules:
+        for flag in MODULE_INTENTS.get(module, ()):
+            setattr(intents, flag, True)
+
+    return intents
+
+
+def build_member_cache(intents: Intents, profile: str) -> MemberCacheFlags:
+    """Returns the member cache policy for the given profile."""
+    if profile == "lazy":
+        # joined keeps members who join while connected; nobody else is cached without chunking.
+        return MemberCacheFlags(voice=False, joined=True)
+    if profile == "lean":
+        return MemberCacheFlags.none()
+    return MemberCacheFlags.from_intents(intents)
+
+
+def chunk_at_startup(profile: str) -> bool:
+    """Only the full profile downloads every guild's member list on connect."""
+    return profile not in ("lazy", "lean")
@@ -1,6 +1,13 @@
+import fcntl
 import json
+import os
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterator
+
+from donkeybot.helpers.metrics_helper import STATE_WRITE_SECONDS
 
 
 class JsonHelper:
@@ -11,7 +18,55 @@ class JsonHelper:
             return json.load(f)
 
     @staticmethod
-    def save_json(data: Any, filepath: str) -> None:
-        """Saves JSON data to the specified filepath."""
-        with open(Path(filepath), "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+    def save_json(data: Any, filepath: str, compact: bool = False) -> None:
+        """Saves JSON data to the specified filepath.
+
+        The data goes to a temporary file that then replaces filepath, so a crash mid-write
+        leaves the previous file intact. compact drops the indentation and encodes in one call
+        to json's C encoder."""
+        start = time.perf_counter()
+        temp = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(Path(temp), "w", encoding="utf-8") as f:
+                if compact:
+                    f.write(json.dumps(data, separators=(",", ":")))
+                else:
+                    json.dump(data, f, indent=4)
+            os.replace(temp, filepath)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+        STATE_WRITE_SECONDS.observe(
+            time.perf_counter() - start, (os.path.basename(filepath),)
+        )
+
+    @staticmethod
+    @contextmanager
+    def locked(filepath: str) -> Iterator[None]:
+        """Holds an exclusive lock on filepath, shared with every process using the same file.
+
+        The lock lives on filepath.lock, since save_json replaces filepath itself."""
+        with open(f"{filepath}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def update_json(
+        filepath: str, update: Callable[[Any], Any], default: Any = None, compact: bool = False
+    ) -> Any:
+        """Applies update to the file's current data under locked() and saves the result.
+
+        Other processes sharing the file keep their changes, unlike saving an in-memory copy.
+        Returns the saved data; update gets default if the file does not exist yet."""
+        with JsonHelper.locked(filepath):
+            try:
+                current = JsonHelper.load_json(filepath)
+            except FileNotFoundError:
+                current = default
+            data = update(current)
+            JsonHelper.save_json(data, filepath, compact=compact)
+        return data
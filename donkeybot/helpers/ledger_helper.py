@@ -0,0 +1,152 @@
+import fcntl
+import os
+import struct
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Iterator, NamedTuple
+
+# timestamp, guild, user, role, action: 29 bytes per event with no padding
+_RECORD = struct.Struct("<IQQQB")
+
+ADDED = 1
+REMOVED = 0
+
+
+class RoleEvent(NamedTuple):
+    timestamp: int
+    guild_id: int
+    user_id: int
+    role_id: int
+    added: bool
+
+
+def _day(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y%m%d")
+
+
+class _SegmentIndex:
+    """Record numbers of each role in one segment, built from a single scan."""
+
+    __slots__ = ("size", "roles")
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.roles: dict[int, array] = {}
+
+    def extend(self, data: bytes, first: int) -> None:
+        for number, (_, _, _, role_id, _) in enumerate(_RECORD.iter_unpack(data), first):
+            positions = self.roles.get(role_id)
+            if positions is None:
+                positions = self.roles[role_id] = array("I")
+            positions.append(number)
+        self.size += len(data)
+
+
+class RoleLedger:
+    """Append-only log of role grants and removals, in one binary segment per UTC day.
+
+    record() only packs the event into a buffer, so it costs the reaction handler nothing
+    measurable. write() stores what take() hands over and is meant to run in a thread; writes
+    from several threads are serialized so their records never interleave. Queries pick
+    segments by day from their file names and records by role from a per-segment index, which
+    is built on first use and extended as the segment grows."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._buffer = bytearray()
+        self._indexes: dict[str, _SegmentIndex] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __len__(self) -> int:
+        """Events waiting to be flushed."""
+        return len(self._buffer) // _RECORD.size
+
+    def record(self, guild_id: int, user_id: int, role_id: int, added: bool) -> None:
+        self._buffer += _RECORD.pack(
+            int(time.time()), guild_id, user_id, role_id, ADDED if added else REMOVED
+        )
+
+    def take(self) -> bytes:
+        """Hands over the buffered events, leaving the buffer empty."""
+        data, self._buffer = bytes(self._buffer), bytearray()
+        return data
+
+    def restore(self, data: bytes) -> None:
+        """Puts events from a failed write back in front of the buffer."""
+        self._buffer[:0] = data
+
+    def _path(self, day: str) -> str:
+        return os.path.join(self.directory, f"roles-{day}.seg")
+
+    def write(self, data: bytes) -> None:
+        """Appends packed events to their day's segments. Blocking; run it in a thread."""
+        by_day: dict[str, bytearray] = {}
+        for offset in range(0, len(data), _RECORD.size):
+            chunk = data[offset : offset + _RECORD.size]
+            by_day.setdefault(_day(_RECORD.unpack(chunk)[0]), bytearray()).extend(chunk)
+
+        with self._lock:
+            for day, chunk in by_day.items():
+                with open(self._path(day), "ab") as f:
+                    # Shard processes sharing the directory append to the same segments.
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    end = f.seek(0, os.SEEK_END)
+                    if end % _RECORD.size:
+                        # Drop a record cut short by a crash so later ones stay aligned.
+                        f.truncate(end - end % _RECORD.size)
+                    f.write(chunk)
+
+    ###########################################################################
+    # Queries
+    ###########################################################################
+    def _days(self, since: int, until: int) -> list[str]:
+        first, last = _day(since), _day(until)
+        days = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith("roles-") and name.endswith(".seg"):
+                day = name[6:-4]
+                if first <= day <= last:
+                    days.append(day)
+        return days
+
+    def _index(self, day: str, data: bytes) -> _SegmentIndex:
+        index = self._indexes.get(day)
+        if index is None:
+            index = self._indexes[day] = _SegmentIndex()
+        if index.size < len(data):
+            # Only today's segment grows; older ones are indexed once.
+            index.extend(data[index.size :], index.size // _RECORD.size)
+        return index
+
+    def events(self, role_id: int, since: int, until: int) -> Iterator[RoleEvent]:
+        """Yields role_id's events between since and until, oldest first. Blocking."""
+        for day in self._days(since, until):
+            with open(self._path(day), "rb") as f:
+                data = f.read()
+            # Ignore a record cut short by a crash mid-write.
+            data = data[: len(data) - len(data) % _RECORD.size]
+            with self._lock:
+                numbers = self._index(day, data).roles.get(role_id, array("I"))[:]
+            for number in numbers:
+                event = RoleEvent(*_RECORD.unpack_from(data, number * _RECORD.size))
+                if since <= event.timestamp <= until:
+                    yield event._replace(added=bool(event.added))
+
+    def trend(self, role_id: int, since: int, until: int) -> dict[str, tuple[int, int]]:
+        """Returns {YYYY-MM-DD: (added, removed)} for role_id between since and until."""
+        days: dict[str, list[int]] = {}
+        for event in self.events(role_id, since, until):
+            day = datetime.fromtimestamp(event.timestamp, timezone.utc).strftime("%Y-%m-%d")
+            counts = days.setdefault(day, [0, 0])
+            counts[0 if event.added else 1] += 1
+        return {day: (added, removed) for day, (added, removed) in days.items()}
+
+    def joined(self, role_id: int, since: int, until: int) -> list[int]:
+        """Returns users whose last change to role_id between since and until was a grant."""
+        last: dict[int, bool] = {}
+        for event in self.events(role_id, since, until):
+            last[event.user_id] = event.added
+        return [user_id for user_id, added in last.items() if added]
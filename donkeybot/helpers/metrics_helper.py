@@ -0,0 +1,277 @@
+import re
+from bisect import bisect_left
+from typing import Callable
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import web
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+_API_PREFIX = re.compile(r"^/api(/v\d+)?")
+_SNOWFLAKE = re.compile(r"/\d{15,21}(?=/|$)")
+_TOKEN = re.compile(r"/[A-Za-z0-9_.-]{60,}(?=/|$)")
+_REACTION = re.compile(r"/reactions/[^/]+")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        REGISTRY.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic counter. Pass label values as one tuple so increments only do a dict lookup."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge(Metric):
+    """Gauge that is either set directly or read from a callback when scraped."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.values: dict[tuple[str, ...], float] = {}
+        self.functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        self.values[labels] = value
+
+    def set_function(self, function: Callable[[], float], labels: tuple[str, ...] = ()) -> None:
+        self.functions[labels] = function
+
+    def render(self) -> list[str]:
+        values = dict(self.values)
+        for labels, function in self.functions.items():
+            try:
+                values[labels] = float(function())
+            except Exception:
+                continue
+
+        lines = self.header()
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; each label set owns a preallocated list of bucket counts."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = buckets
+        self.counts: dict[tuple[str, ...], list[int]] = {}
+        self.sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, counts in sorted(self.counts.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                label_str = _labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+    def summary(self, labels: tuple[str, ...] = ()) -> str:
+        """Returns non-empty bucket counts on one line, for logging."""
+        counts = self.counts.get(labels, [])
+        bounds = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return " ".join(f"{b}:{c}" for b, c in zip(bounds, counts) if c)
+
+
+REGISTRY: list[Metric] = []
+
+GATEWAY_LATENCY = Gauge(
+    "donkeybot_gateway_latency_seconds",
+    "Latency between a gateway HEARTBEAT and its ACK by bot and shard.",
+    ("bot", "shard"),
+)
+GATEWAY_EVENTS = Counter(
+    "donkeybot_gateway_events_total",
+    "Gateway dispatch events received by bot and shard.",
+    ("bot", "shard"),
+)
+DISCORD_REST_REQUESTS = Counter(
+    "donkeybot_discord_rest_requests_total",
+    "Discord REST requests by method, route and status.",
+    ("method", "route", "status"),
+)
+DISCORD_REST_RATELIMITED = Counter(
+    "donkeybot_discord_rest_ratelimited_total",
+    "Discord REST responses with status 429 by route.",
+    ("method", "route"),
+)
+TWITCH_API_CALLS = Counter(
+    "donkeybot_twitch_api_calls_total",
+    "Twitch Helix requests by endpoint and status.",
+    ("endpoint", "status"),
+)
+TWITCH_BUDGET_REMAINING = Gauge(
+    "donkeybot_twitch_budget_remaining",
+    "Helix rate limit points left in the current window by app, from response headers.",
+    ("app",),
+)
+STREAM_LOOP_SECONDS = Histogram(
+    "donkeybot_stream_loop_seconds", "Duration of a stream_loop tick."
+)
+REACTION_HANDLER_SECONDS = Histogram(
+    "donkeybot_reaction_handler_seconds",
+    "Duration of reaction listeners by event.",
+    ("event",),
+)
+LOOP_LAG_SECONDS = Histogram(
+    "donkeybot_event_loop_lag_seconds", "How late the event loop woke up for a timer."
+)
+STATE_WRITE_SECONDS = Histogram(
+    "donkeybot_state_write_seconds", "Duration of JSON state file writes.", ("file",)
+)
+REST_QUEUE_DEPTH = Gauge(
+    "donkeybot_rest_queue_depth",
+    "Discord REST requests waiting in the outbound scheduler by bot and priority.",
+    ("bot", "priority"),
+)
+REST_QUEUE_WAIT_SECONDS = Histogram(
+    "donkeybot_rest_queue_wait_seconds",
+    "Time Discord REST requests waited in the outbound scheduler by priority.",
+    ("priority",),
+)
+REST_SHED = Counter(
+    "donkeybot_rest_shed_total",
+    "Discord REST requests dropped by the outbound scheduler by bot and priority.",
+    ("bot", "priority"),
+)
+ANNOUNCE_DELAY_SECONDS = Histogram(
+    "donkeybot_announce_delay_seconds",
+    "Time from Twitch's stream start to the go-live announcement being posted in a guild.",
+    buckets=(5.0, 15.0, 30.0, 60.0, 90.0, 120.0, 180.0, 300.0, 600.0),
+)
+DEDUPE_HITS = Counter(
+    "donkeybot_dedupe_hits_total",
+    "Redelivered gateway events skipped as duplicates by bot and event.",
+    ("bot", "event"),
+)
+IMAGE_RENDER_SECONDS = Histogram(
+    "donkeybot_image_render_seconds",
+    "Duration of image pipeline work off the event loop by result.",
+    ("result",),
+)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def route_template(path: str) -> str:
+    """Collapses ids, tokens and emoji in a Discord API path so routes stay low-cardinality."""
+    path = _REACTION.sub("/reactions/{emoji}", path)
+    path = _TOKEN.sub("/{token}", path)
+    return _SNOWFLAKE.sub("/{id}", path)
+
+
+def discord_trace_config() -> aiohttp.TraceConfig:
+    """Returns a TraceConfig that counts REST requests made through discord.py's session."""
+
+    async def on_request_end(
+        session: aiohttp.ClientSession,
+        context: object,
+        params: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        url = urlsplit(str(params.url))
+        if not url.hostname or not url.hostname.endswith("discord.com"):
+            return
+
+        route = route_template(_API_PREFIX.sub("", url.path) or "/")
+        status = params.response.status
+        DISCORD_REST_REQUESTS.inc((params.method, route, str(status)))
+        if status == 429:
+            DISCORD_REST_RATELIMITED.inc((params.method, route))
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+
+class MetricsServer:
+    """Serves every registered metric in the Prometheus text format on /metrics."""
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+        self._runner: web.AppRunner | None = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8")
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
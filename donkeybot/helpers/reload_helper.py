@@ -0,0 +1,156 @@
+import ast
+import hashlib
+import importlib
+import os
+import sys
+from dataclasses import dataclass, field
+from types import ModuleType
+
+PACKAGE = "donkeybot"
+
+# These modules own state that must outlive a reload (loaded JSON, the aiohttp session, the
+# Twitch client, metric counters and error fingerprints). Changes to them are reported instead
+# of reloaded.
+PINNED_MODULES: frozenset[str] = frozenset(
+    {
+        "donkeybot.main",
+        "donkeybot.helpers.config_helper",
+        "donkeybot.helpers.aiohttp_helper",
+        "donkeybot.helpers.metrics_helper",
+        "donkeybot.helpers.twitch_helper",
+        "donkeybot.helpers.reload_helper",
+        "donkeybot.helpers.sentry_helper",
+    }
+)
+
+
+@dataclass
+class SourceStamp:
+    mtime: float
+    digest: str
+
+
+@dataclass
+class ReloadPlan:
+    helpers: list[str] = field(default_factory=list)
+    extensions: list[str] = field(default_factory=list)
+    restart_required: list[str] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not self.helpers and not self.extensions
+
+
+class ModuleTracker:
+    """Tracks source stamps of DonkeyBot's modules so only changed ones get reloaded."""
+
+    def __init__(self) -> None:
+        self._stamps: dict[str, SourceStamp] = {}
+        self._imports: dict[str, set[str]] = {}
+
+    @staticmethod
+    def _tracked_modules() -> dict[str, ModuleType]:
+        return {
+            name: module
+            for name, module in list(sys.modules.items())
+            if name.startswith(f"{PACKAGE}.")
+            and module is not None
+            and getattr(module, "__file__", None)
+        }
+
+    @staticmethod
+    def _read(path: str) -> tuple[SourceStamp, bytes]:
+        with open(path, "rb") as f:
+            source = f.read()
+        return SourceStamp(os.path.getmtime(path), hashlib.sha256(source).hexdigest()), source
+
+    @staticmethod
+    def _parse_imports(source: bytes) -> set[str]:
+        imports: set[str] = set()
+        for node in ast.walk(ast.parse(source)):
+            if isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                names = [node.module]
+            elif isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            else:
+                continue
+            imports.update(n for n in names if n.startswith(f"{PACKAGE}."))
+        return imports
+
+    def _record(self, name: str, path: str) -> None:
+        stamp, source = self._read(path)
+        self._stamps[name] = stamp
+        self._imports[name] = self._parse_imports(source)
+
+    def snapshot(self) -> None:
+        """Records the current stamp of every loaded DonkeyBot module."""
+        for name, module in self._tracked_modules().items():
+            self._record(name, module.__file__)  # type: ignore[arg-type]
+
+    def changed(self) -> set[str]:
+        """Returns modules whose source differs from the last snapshot.
+
+        The mtime is checked first so unchanged files are never re-hashed."""
+        changed: set[str] = set()
+        for name, module in self._tracked_modules().items():
+            path: str = module.__file__  # type: ignore[assignment]
+            stamp = self._stamps.get(name)
+            if stamp is None:
+                continue
+
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if mtime == stamp.mtime:
+                continue
+
+            new_stamp, _ = self._read(path)
+            if new_stamp.digest == stamp.digest:
+                stamp.mtime = new_stamp.mtime
+            else:
+                changed.add(name)
+        return changed
+
+    def _dependents(self, names: set[str]) -> set[str]:
+        """Expands names with every module importing them; pinned modules stop the walk."""
+        result = set(names)
+        pending = list(names)
+        while pending:
+            current = pending.pop()
+            for module, imports in self._imports.items():
+                if module in PINNED_MODULES:
+                    continue
+                if current in imports and module not in result:
+                    result.add(module)
+                    pending.append(module)
+        return result
+
+    def plan(self, extensions: list[str], force: bool = False) -> ReloadPlan:
+        """Builds the list of helpers and extensions to reload, ordered by dependency."""
+        plan = ReloadPlan()
+        changed = self.changed()
+        plan.restart_required = sorted(changed & PINNED_MODULES)
+
+        affected = self._dependents(changed - PINNED_MODULES)
+        plan.extensions = [e for e in extensions if force or e in affected]
+
+        helpers = {m for m in affected if m not in extensions}
+        while helpers:
+            ready = sorted(h for h in helpers if not (self._imports.get(h, set()) & helpers))
+            if not ready:
+                ready = sorted(helpers)
+            plan.helpers.extend(ready)
+            helpers.difference_update(ready)
+
+        return plan
+
+    def reload_helpers(self, plan: ReloadPlan) -> None:
+        for name in plan.helpers:
+            importlib.reload(sys.modules[name])
+
+    def commit(self, names: list[str]) -> None:
+        """Refreshes stamps after modules were reloaded, picking up newly imported ones."""
+        for name, module in self._tracked_modules().items():
+            if name in names or name not in self._stamps:
+                self._record(name, module.__file__)  # type: ignore[arg-type]
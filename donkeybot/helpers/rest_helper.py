@@ -0,0 +1,285 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Iterator
+
+from discord.http import HTTPClient, Route
+
+from donkeybot.helpers.metrics_helper import REST_QUEUE_DEPTH, REST_QUEUE_WAIT_SECONDS, REST_SHED
+
+
+class Priority(IntEnum):
+    """Outbound request classes; lower values are sent first."""
+
+    ANNOUNCE = 0
+    INTERACTION = 1
+    ROLE = 2
+    DM = 3
+    COSMETIC = 4
+
+
+# Requests a class may have waiting before new ones are shed, and how long one may wait.
+# None means never shed.
+MAX_QUEUE: dict[Priority, int | None] = {
+    Priority.ANNOUNCE: None,
+    Priority.INTERACTION: None,
+    Priority.ROLE: None,
+    Priority.DM: 200,
+    Priority.COSMETIC: 10,
+}
+MAX_WAIT: dict[Priority, float | None] = {
+    Priority.ANNOUNCE: None,
+    Priority.INTERACTION: None,
+    Priority.ROLE: None,
+    Priority.DM: 30.0,
+    Priority.COSMETIC: 10.0,
+}
+
+# Kept a little under Discord's 50 requests per second so bursts do not hit the global 429.
+GLOBAL_BUDGET = (45, 1.0)
+
+# Route path -> (requests, per seconds) for each channel, guild or webhook, a little under what
+# Discord reports in its X-RateLimit headers. Routes not listed only count against the global
+# budget and are left to discord.py's own bucket handling.
+ROUTE_BUDGETS: dict[str, tuple[int, float]] = {
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me": (1, 0.3),
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{member_id}": (1, 0.3),
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}": (1, 0.3),
+    "/channels/{channel_id}/messages/{message_id}/reactions": (1, 0.3),
+    "/guilds/{guild_id}/members/{user_id}/roles/{role_id}": (10, 1.1),
+    "/channels/{channel_id}/messages": (5, 5.5),
+    "/channels/{channel_id}/messages/{message_id}": (5, 1.1),
+    "/users/@me": (2, 600.0),
+}
+
+# Used when the caller did not pick a class with rest_priority().
+_ROUTE_PRIORITY: dict[str, Priority] = {
+    "/guilds/{guild_id}/members/{user_id}/roles/{role_id}": Priority.ROLE,
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me": Priority.ROLE,
+    "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{member_id}": Priority.ROLE,
+    "/users/@me/channels": Priority.DM,
+    "/users/@me": Priority.COSMETIC,
+}
+
+_PRIORITY: ContextVar[Priority | None] = ContextVar("rest_priority", default=None)
+
+
+class RequestShed(Exception):
+    """Raised instead of sending a low-priority request while the scheduler is under pressure."""
+
+
+@contextmanager
+def rest_priority(priority: Priority) -> Iterator[None]:
+    """Sends the Discord requests made inside the block with the given priority."""
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def set_rest_priority(priority: Priority) -> None:
+    """Sets the priority for the rest of the current task, e.g. an interaction's callback."""
+    _PRIORITY.set(priority)
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, count: int, per: float, now: float) -> None:
+        self.rate = count / per
+        self.burst = float(count)
+        self.tokens = float(count)
+        self.updated = now
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        return max(0.0, (1 - self.refill(now)) / self.rate)
+
+
+@dataclass(eq=False)
+class _Waiter:
+    priority: Priority
+    route: Route
+    enqueued: float
+    future: asyncio.Future = field(repr=False)
+
+
+class RestScheduler:
+    """Orders a bot's outbound Discord requests by priority within global and per-route budgets.
+
+    Requests start right away while the budgets allow it and nothing more urgent is waiting.
+    Otherwise they queue per priority and one task grants them in priority order as tokens
+    refill; a request blocked on its own route does not hold up other routes. DMs and
+    cosmetic requests are shed with RequestShed when their queue is full or they waited too
+    long, and cosmetic ones also whenever more urgent work is queued."""
+
+    def __init__(
+        self,
+        name: str,
+        global_budget: tuple[int, float] = GLOBAL_BUDGET,
+        route_budgets: dict[str, tuple[int, float]] = ROUTE_BUDGETS,
+    ) -> None:
+        self.name = name
+        self.transport: Callable[..., Awaitable[Any]] | None = None
+        self.granted = [0] * len(Priority)
+        self.shed = [0] * len(Priority)
+        self.set_budgets(global_budget, route_budgets)
+        self._queues: list[deque[_Waiter]] = [deque() for _ in Priority]
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+        for priority in Priority:
+            REST_QUEUE_DEPTH.set_function(
+                lambda p=priority: len(self._queues[p]), (name, priority.name.lower())
+            )
+
+    def set_budgets(
+        self, global_budget: tuple[int, float], route_budgets: dict[str, tuple[int, float]]
+    ) -> None:
+        self.route_budgets = route_budgets
+        self._global = _TokenBucket(*global_budget, time.monotonic())
+        self._buckets: dict[str, _TokenBucket] = {}
+
+    def install(self, http: HTTPClient) -> None:
+        """Routes every request of http through the scheduler."""
+        self.transport = http.request
+        http.request = self.request  # type: ignore[method-assign]
+
+    async def request(self, route: Route, **kwargs: Any) -> Any:
+        assert self.transport is not None
+        priority = _PRIORITY.get()
+        if priority is None:
+            priority = _ROUTE_PRIORITY.get(route.path, Priority.INTERACTION)
+        await self.acquire(priority, route)
+        return await self.transport(route, **kwargs)
+
+    def depth(self, priority: Priority) -> int:
+        return len(self._queues[priority])
+
+    def backlogged(self, priority: Priority) -> bool:
+        """Whether anything more urgent than priority is waiting, e.g. to skip cosmetic work."""
+        return any(self._queues[:priority])
+
+    def describe(self) -> str:
+        """Queued, sent and shed requests per priority, one line each, for diagnostics."""
+        return "\n".join(
+            f"{p.name.lower()}: {len(self._queues[p])} queued, {self.granted[p]} sent, "
+            f"{self.shed[p]} shed"
+            for p in Priority
+        )
+
+    ###########################################################################
+    # Budgets
+    ###########################################################################
+    def _bucket(self, route: Route, now: float) -> _TokenBucket | None:
+        budget = self.route_budgets.get(route.path)
+        if budget is None:
+            return None
+        # One bucket per route and channel, guild or webhook, like Discord's.
+        bucket = f"{route.key}:{route.major_parameters}"
+        found = self._buckets.get(bucket)
+        if found is None:
+            if len(self._buckets) > 4096:
+                # Full buckets carry no state worth keeping.
+                self._buckets = {
+                    k: b for k, b in self._buckets.items() if b.refill(now) < b.burst
+                }
+            found = self._buckets[bucket] = _TokenBucket(*budget, now)
+        return found
+
+    def _take(self, route: Route, now: float) -> bool:
+        if self._global.refill(now) < 1:
+            return False
+        bucket = self._bucket(route, now)
+        if bucket is not None:
+            if bucket.refill(now) < 1:
+                return False
+            bucket.tokens -= 1
+        self._global.tokens -= 1
+        return True
+
+    ###########################################################################
+    # Queueing
+    ###########################################################################
+    def _shed(self, priority: Priority) -> RequestShed:
+        self.shed[priority] += 1
+        REST_SHED.inc((self.name, priority.name.lower()))
+        return RequestShed(f"{priority.name.lower()} request shed under load")
+
+    def _grant(self, priority: Priority, waited: float) -> None:
+        self.granted[priority] += 1
+        REST_QUEUE_WAIT_SECONDS.observe(waited, (priority.name.lower(),))
+
+    async def acquire(self, priority: Priority, route: Route) -> None:
+        """Waits until route may be requested. Raises RequestShed if the request is dropped."""
+        now = time.monotonic()
+        urgent = any(self._queues[: priority + 1])
+        if not urgent and self._take(route, now):
+            self._grant(priority, 0.0)
+            return
+
+        limit = MAX_QUEUE[priority]
+        if limit is not None and len(self._queues[priority]) >= limit:
+            raise self._shed(priority)
+        if priority == Priority.COSMETIC and any(self._queues[:priority]):
+            raise self._shed(priority)
+
+        waiter = _Waiter(priority, route, now, asyncio.get_running_loop().create_future())
+        self._queues[priority].append(waiter)
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch())
+        await waiter.future
+
+    def _pass(self, now: float) -> float | None:
+        """Grants what the budgets allow, most urgent first; returns when to look again."""
+        delay: float | None = None
+        for priority, queue in enumerate(self._queues):
+            max_wait = MAX_WAIT[Priority(priority)]
+            kept: deque[_Waiter] = deque()
+            while queue:
+                waiter = queue.popleft()
+                if waiter.future.done():
+                    continue
+                if max_wait is not None and now - waiter.enqueued > max_wait:
+                    waiter.future.set_exception(self._shed(waiter.priority))
+                    continue
+                if self._global.refill(now) < 1:
+                    # Nothing else can go out until the global budget refills.
+                    kept.append(waiter)
+                    kept.extend(queue)
+                    queue.clear()
+                    self._queues[priority] = kept
+                    return self._global.delay(now)
+                if self._take(waiter.route, now):
+                    self._grant(waiter.priority, now - waiter.enqueued)
+                    waiter.future.set_result(None)
+                    continue
+
+                kept.append(waiter)
+                bucket = self._bucket(waiter.route, now)
+                wait = bucket.delay(now) if bucket is not None else 0.0
+                delay = wait if delay is None else min(delay, wait)
+            self._queues[priority] = kept
+        return delay
+
+    async def _dispatch(self) -> None:
+        while any(self._queues):
+            self._wakeup.clear()
+            delay = self._pass(time.monotonic())
+            if not any(self._queues):
+                break
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
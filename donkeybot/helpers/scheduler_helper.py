@@ -0,0 +1,91 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import Awaitable, Callable, Hashable
+
+_log = logging.getLogger("DonkeyBot")
+
+
+class HeapScheduler:
+    """Delivers keys when they come due from a single task sleeping on a min-heap.
+
+    Keys due within ``batch_window`` seconds of each other are handed to the callback together.
+    Cancelled keys are skipped lazily and the heap is compacted once most of it is stale."""
+
+    def __init__(
+        self,
+        callback: Callable[[list[Hashable]], Awaitable[None]],
+        batch_window: float = 1.0,
+        max_batch: int = 200,
+    ) -> None:
+        self._callback = callback
+        self._batch_window = batch_window
+        self._max_batch = max_batch
+        self._heap: list[tuple[float, Hashable]] = []
+        self._cancelled: set[Hashable] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._heap) - len(self._cancelled)
+
+    def push(self, due: float, key: Hashable) -> None:
+        """Schedules key at the epoch timestamp due. Keys must not be reused once discarded."""
+        if not self._heap or due < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (due, key))
+
+    def discard(self, key: Hashable) -> None:
+        self._cancelled.add(key)
+        if len(self._cancelled) > len(self._heap) // 2:
+            self._heap = [e for e in self._heap if e[1] not in self._cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _pop_due(self) -> list[Hashable]:
+        batch: list[Hashable] = []
+        cutoff = time.time() + self._batch_window
+        while self._heap and self._heap[0][0] <= cutoff and len(batch) < self._max_batch:
+            _, key = heapq.heappop(self._heap)
+            if key in self._cancelled:
+                self._cancelled.discard(key)
+                continue
+            batch.append(key)
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            while self._heap and self._heap[0][1] in self._cancelled:
+                self._cancelled.discard(heapq.heappop(self._heap)[1])
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            batch = self._pop_due()
+            if not batch:
+                continue
+
+            try:
+                await self._callback(batch)
+            except Exception as e:
+                _log.exception("SCHEDULER_CALLBACK_EXCEPTION", exc_info=e)
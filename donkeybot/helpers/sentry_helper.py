@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import time
+import traceback
+from typing import Any
+
+import sentry_sdk
+
+from donkeybot.helpers.config_helper import (
+    SENTRY_ERROR_WINDOW,
+    SENTRY_TRACES_RATE,
+    SENTRY_TRACES_RATES,
+)
+
+
+def _parse_rates(value: str) -> dict[str, float]:
+    """Parses "stream_loop=0.01,http.server=0" into a rate per transaction name or op."""
+    rates: dict[str, float] = {}
+    for part in value.split(","):
+        name, _, rate = part.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+TRACE_RATES: dict[str, float] = _parse_rates(SENTRY_TRACES_RATES)
+
+
+def traces_sampler(context: dict[str, Any]) -> float:
+    """Samples transactions by name, then by op, then at SENTRY_TRACES_RATE."""
+    if context.get("parent_sampled") is not None:
+        return float(context["parent_sampled"])
+
+    transaction = context.get("transaction_context", {})
+    for key in (transaction.get("name"), transaction.get("op")):
+        if key in TRACE_RATES:
+            return TRACE_RATES[key]
+    return SENTRY_TRACES_RATE
+
+
+def init_sentry(dsn: str) -> None:
+    """Initialises Sentry once per process, however many bots it hosts."""
+    if not dsn or sentry_sdk.get_client().is_active():
+        return
+
+    sentry_sdk.init(
+        dsn=dsn,
+        send_default_pii=True,
+        traces_sampler=traces_sampler,
+    )
+
+
+class ErrorAggregator:
+    """Sends the first occurrence of each distinct error and then periodic repeat counts.
+
+    A timer reports each repeat count when its window ends, and forgets errors that have not
+    happened for a whole window, so they are sent in full again when they come back."""
+
+    max_fingerprints = 1024
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self.suppressed = 0
+        # fingerprint -> [last report time, occurrences since report, summary, last seen]
+        self._seen: dict[str, list[Any]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._due = float("inf")
+
+    @staticmethod
+    def fingerprint(error: BaseException) -> str:
+        """Hashes the exception type and the innermost frames so changing messages still match."""
+        frames = traceback.extract_tb(error.__traceback__)[-5:]
+        parts = [type(error).__qualname__]
+        parts.extend(f"{f.filename}:{f.lineno}:{f.name}" for f in frames)
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+    def _report(self, fingerprint: str, entry: list[Any]) -> None:
+        with sentry_sdk.new_scope() as scope:
+            scope.fingerprint = [fingerprint]
+            scope.set_extra("occurrences", entry[1])
+            sentry_sdk.capture_message(
+                f"{entry[2]} repeated {entry[1]} times since last report", level="warning"
+            )
+        entry[0] = time.monotonic()
+        entry[1] = 0
+
+    def capture(self, error: BaseException) -> None:
+        fingerprint = self.fingerprint(error)
+        entry = self._seen.get(fingerprint)
+        now = time.monotonic()
+
+        if entry is not None and now - entry[3] >= self.window:
+            # Idle for a whole window, e.g. no timer ran: send it in full again.
+            if entry[1]:
+                self._report(fingerprint, entry)
+            del self._seen[fingerprint]
+            entry = None
+
+        if entry is None:
+            if len(self._seen) >= self.max_fingerprints:
+                self.flush()
+                self._seen.clear()
+            summary = f"{type(error).__qualname__}: {error}"[:200]
+            self._seen[fingerprint] = [now, 0, summary, now]
+            sentry_sdk.capture_exception(error)
+            self._schedule(now + self.window)
+            return
+
+        entry[1] += 1
+        entry[3] = now
+        self.suppressed += 1
+        if now - entry[0] >= self.window:
+            self._report(fingerprint, entry)
+        self._schedule(entry[0] + self.window)
+
+    def _schedule(self, due: float) -> None:
+        """Makes sure the timer runs by due; without a running loop, capture() catches up."""
+        if self._timer is not None and self._due <= due:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._due = due
+        # A little late rather than early, so the window has surely ended when it fires.
+        self._timer = loop.call_later(max(0.0, due - time.monotonic()) + 0.05, self._tick)
+
+    def _tick(self) -> None:
+        self._timer = None
+        self._due = float("inf")
+        now = time.monotonic()
+        due = float("inf")
+        for fingerprint, entry in list(self._seen.items()):
+            if entry[1] and now - entry[0] >= self.window:
+                self._report(fingerprint, entry)
+            if not entry[1] and now - entry[3] >= self.window:
+                del self._seen[fingerprint]
+                continue
+            due = min(due, entry[0] + self.window if entry[1] else entry[3] + self.window)
+        if self._seen:
+            self._schedule(due)
+
+    def flush(self) -> None:
+        """Reports every pending repeat count, e.g. on shutdown."""
+        for fingerprint, entry in self._seen.items():
+            if entry[1]:
+                self._report(fingerprint, entry)
+
+
+ERRORS = ErrorAggregator(SENTRY_ERROR_WINDOW)
+
+
+def capture_error(error: BaseException) -> None:
+    ERRORS.capture(error)
@@ -2,12 +2,11 @@ import os
 import shutil
 
 
-def setup_json():
-    json_dir = "json/"
+def setup_json(json_dir: str = "json/"):
     os.makedirs(json_dir, exist_ok=True)
 
     for file in os.listdir(".json/"):
         og_path = ".json/" + file
-        file_path = json_dir + file
+        file_path = os.path.join(json_dir, file)
         if not os.path.exists(file_path):
             shutil.copy2(og_path, file_path)
@@ -1,32 +1,165 @@
+import atexit
+import copy
+import glob
+import gzip
 import logging
 import os
+import queue
 import shutil
+import threading
+import time
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
+from donkeybot.helpers.config_helper import (
+    LOG_BACKUPS,
+    LOG_MAX_BYTES,
+    LOG_RATE_LIMIT,
+    LOG_ROTATE_HOURS,
+)
 
-def setup_logging():
-    log_dir = "logs/"
-    log_file = log_dir + "current.log"
+LOG_DIR = "logs/"
+LOG_FILE = LOG_DIR + "current.log"
 
-    os.makedirs(log_dir, exist_ok=True)
+_listener: QueueListener | None = None
 
-    if os.path.exists(log_file):
-        timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H-%M-%S")
-        shutil.move(log_file, log_dir + f"{timestamp}_donkeybot.log")
+
+def _compress(path: str) -> None:
+    """Gzips an archived log and prunes the oldest archives past LOG_BACKUPS."""
+    # Written under a temporary name so pruning never sees an archive still being compressed.
+    with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.replace(path + ".gz.tmp", path + ".gz")
+    os.remove(path)
+
+    archives = sorted(glob.glob(LOG_DIR + "*_donkeybot.log.gz"))
+    for old in archives[: max(len(archives) - LOG_BACKUPS, 0)]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def _archive(path: str) -> None:
+    """Moves the log aside under a timestamped name and compresses it on a background thread."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H-%M-%S")
+    archived = LOG_DIR + f"{timestamp}_donkeybot.log"
+    suffix = 1
+    while os.path.exists(archived) or os.path.exists(archived + ".gz"):
+        archived = LOG_DIR + f"{timestamp}-{suffix}_donkeybot.log"
+        suffix += 1
+    shutil.move(path, archived)
+    threading.Thread(target=_compress, args=(archived,), daemon=True).start()
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """Rolls the log over once it passes max_bytes or once interval seconds have elapsed."""
+
+    def __init__(self, filename: str, max_bytes: int, interval: float) -> None:
+        super().__init__(filename, maxBytes=max_bytes, encoding="utf-8")
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.interval > 0 and record.created >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        if self.stream:
+            self.stream.close()
+            self.stream = None  # type: ignore[assignment]
+
+        _archive(self.baseFilename)
+
+        self.stream = self._open()
+        self.rollover_at = time.time() + self.interval
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueues records with their message merged but otherwise unformatted, so timestamps and
+    tracebacks are formatted on the listener thread.
+
+    The arguments are merged here, like QueueHandler does, so a dict or list that changes after
+    the call is logged as it was at the time."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most burst records per logger and message template every period seconds.
+
+    Warnings, errors and exceptions are never dropped."""
+
+    max_keys = 4096
+
+    def __init__(self, burst: int, period: float = 60) -> None:
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._windows: dict[tuple[str, object], list[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        window = self._windows.get(key)
+
+        if window is None or record.created - window[0] >= self.period:
+            if len(self._windows) >= self.max_keys:
+                cutoff = record.created - self.period
+                self._windows = {k: w for k, w in self._windows.items() if w[0] >= cutoff}
+
+            suppressed = int(window[1]) - self.burst if window else 0
+            self._windows[key] = [record.created, 1]
+            if suppressed > 0 and isinstance(record.msg, str):
+                record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+            return True
+
+        window[1] += 1
+        return window[1] <= self.burst
+
+
+def setup_logging() -> QueueListener:
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    os.makedirs(LOG_DIR, exist_ok=True)
+    _archive(LOG_FILE)
 
     formatter = logging.Formatter(
         "[{asctime}] [{levelname:<8}] {name}: {message}", "%Y-%m-%d %H:%M:%S", style="{"
     )
 
-    file_handler = logging.FileHandler(filename=log_file, encoding="utf-8", mode="w")
+    file_handler = SizeAndTimeRotatingFileHandler(
+        LOG_FILE, max_bytes=LOG_MAX_BYTES, interval=LOG_ROTATE_HOURS * 3600
+    )
     file_handler.setFormatter(formatter)
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
 
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = _DeferredQueueHandler(log_queue)
+    if LOG_RATE_LIMIT > 0:
+        queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT))
+
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    logger.addHandler(queue_handler)
 
     logging.getLogger("Discord.py").setLevel(logging.INFO)
+
+    _listener = QueueListener(log_queue, file_handler, console_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    return _listener
@@ -0,0 +1,90 @@
+import asyncio
+import math
+import time
+
+import discord
+
+from donkeybot.helpers.metrics_helper import GATEWAY_EVENTS, GATEWAY_LATENCY
+
+
+def gateway_position(bot: discord.Client, guild_id: int) -> tuple[str, int] | None:
+    """Returns the session id and sequence number of the connection that serves guild_id.
+
+    discord.py sets the sequence right before parsing each event, so while an event is being
+    dispatched this identifies its delivery; a redelivered event repeats it."""
+    if isinstance(bot, discord.AutoShardedClient):
+        info = bot.shards.get((guild_id >> 22) % (bot.shard_count or 1))
+        ws = info._parent.ws if info is not None else None
+    else:
+        ws = bot.ws
+    if ws is None or ws.session_id is None or ws.sequence is None:
+        return None
+    return ws.session_id, ws.sequence
+
+
+class ShardMonitor:
+    """Samples the latency and dispatch rate of each shard the client runs.
+
+    The rate comes from the gateway sequence number, which increases by one per dispatched
+    event, so no per-event hook is needed."""
+
+    def __init__(self, bot: discord.Client, name: str, interval: float = 15.0) -> None:
+        self.bot = bot
+        self.name = name
+        self.interval = interval
+        self.latencies: dict[int, float] = {}
+        self.rates: dict[int, float] = {}
+        self._sequences: dict[int, tuple[float, int]] = {}
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _shards(self) -> list[tuple[int, float, int | None]]:
+        """Returns (shard id, latency, sequence) for every shard in this process."""
+        bot = self.bot
+        if isinstance(bot, discord.AutoShardedClient):
+            # ShardInfo does not expose its websocket, so read it from the underlying shard.
+            return [
+                (shard_id, info.latency, info._parent.ws.sequence)
+                for shard_id, info in bot.shards.items()
+            ]
+        ws = bot.ws
+        return [(bot.shard_id or 0, bot.latency, ws.sequence if ws is not None else None)]
+
+    def sample(self) -> None:
+        now = time.monotonic()
+        for shard_id, latency, sequence in self._shards():
+            labels = (self.name, str(shard_id))
+            if math.isfinite(latency):
+                self.latencies[shard_id] = latency
+                GATEWAY_LATENCY.set(latency, labels)
+            if sequence is None:
+                continue
+
+            last = self._sequences.get(shard_id)
+            self._sequences[shard_id] = (now, sequence)
+            if last is None:
+                continue
+
+            # A new session restarts the sequence from 1.
+            delta = sequence - last[1] if sequence >= last[1] else sequence
+            GATEWAY_EVENTS.inc(labels, delta)
+            self.rates[shard_id] = delta / (now - last[0])
+
+    async def _run(self) -> None:
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def describe(self) -> str:
+        """Returns one line per shard for diagnostics."""
+        return "\n".join(
+            f"{shard_id}: {latency * 1000:.0f} ms, {self.rates.get(shard_id, 0.0):.1f} ev/s"
+            for shard_id, latency in sorted(self.latencies.items())
+        ) or "not connected"
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import signal
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+
+class WorkTracker:
+    """Counts in-flight jobs so a shutdown can stop taking new ones and wait for the rest.
+
+    Handlers return early once accepting is False and wrap their work in job()."""
+
+    def __init__(self) -> None:
+        self.accepting = True
+        self.active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @contextmanager
+    def job(self) -> Iterator[None]:
+        self.active += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            if self.active == 0:
+                self._idle.set()
+
+    def close(self) -> None:
+        self.accepting = False
+
+    async def drain(self, timeout: float) -> int:
+        """Waits up to timeout for in-flight jobs to finish; returns how many are left."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.active
+
+
+class PhaseTimer:
+    """Logs how long each named phase of a shutdown took, then a one-line summary."""
+
+    def __init__(self, log: logging.Logger) -> None:
+        self._log = log
+        self._start = time.perf_counter()
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phases.append((name, elapsed))
+            self._log.info("Shutdown: %s took %.2fs", name, elapsed)
+
+    def summary(self) -> None:
+        total = time.perf_counter() - self._start
+        steps = ", ".join(f"{name} {elapsed:.2f}s" for name, elapsed in self.phases)
+        self._log.info("Shutdown finished in %.2fs (%s)", total, steps)
+
+
+def on_signals(callback: Callable[[], None]) -> None:
+    """Calls callback on SIGTERM or SIGINT, e.g. when Docker stops the container."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, callback)
+        except (NotImplementedError, RuntimeError):
+            # Windows event loops and non-main threads cannot install signal handlers.
+            pass
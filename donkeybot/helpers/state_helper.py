@@ -0,0 +1,174 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from donkeybot.helpers.json_helper import JsonHelper
+
+# Written into live.json and reactions.json. Files without it are the version 1 layout of
+# string-keyed nested dicts, which is still read.
+STATE_VERSION = 2
+
+
+@dataclass(slots=True)
+class StreamPost:
+    """A go-live announcement in one guild."""
+
+    embed: int
+    # a separate role ping message from older announcements; 0 when the embed carries it
+    role: int = 0
+
+
+@dataclass(slots=True)
+class LiveStream:
+    user_id: str
+    game: str
+    thumbnail: str
+    pfp: str | None
+    check: int = 0
+    # guild id -> the announcement posted in that guild
+    posts: dict[int, StreamPost] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ReactionMenu:
+    """Reaction roles of one message."""
+
+    # emoji -> role id
+    roles: dict[str, int] = field(default_factory=dict)
+
+
+###########################################################################
+# live.json
+###########################################################################
+def decode_live(data: dict[str, Any]) -> dict[str, LiveStream]:
+    """Reads live.json in any version; pre-multi-guild posts are filed under guild 0."""
+    if data.get("version") == STATE_VERSION:
+        return {
+            user: LiveStream(
+                user_id=stream["user_id"],
+                game=stream["game"],
+                thumbnail=stream["thumbnail"],
+                pfp=stream["pfp"],
+                check=stream["check"],
+                posts={
+                    guild_id: StreamPost(embed, role) for guild_id, embed, role in stream["posts"]
+                },
+            )
+            for user, stream in data["streams"].items()
+        }
+
+    live: dict[str, LiveStream] = {}
+    for user, stream in data.items():
+        if "posts" in stream:
+            posts = {
+                int(guild_id): StreamPost(int(post["embed"]), int(post["role"]))
+                for guild_id, post in stream["posts"].items()
+            }
+        else:
+            posts = {0: StreamPost(int(stream["embed"]), int(stream["role"]))}
+        live[user] = LiveStream(
+            user_id=stream["user_id"],
+            game=stream["game"],
+            thumbnail=stream["thumbnail"],
+            pfp=stream["pfp"],
+            check=stream.get("check", 0),
+            posts=posts,
+        )
+    return live
+
+
+def encode_live(live: dict[str, LiveStream]) -> dict[str, Any]:
+    return {
+        "version": STATE_VERSION,
+        "streams": {
+            user: {
+                "user_id": stream.user_id,
+                "game": stream.game,
+                "thumbnail": stream.thumbnail,
+                "pfp": stream.pfp,
+                "check": stream.check,
+                "posts": [
+                    [guild_id, post.embed, post.role] for guild_id, post in stream.posts.items()
+                ],
+            }
+            for user, stream in live.items()
+        },
+    }
+
+
+def save_live(live: dict[str, LiveStream], path: str) -> None:
+    JsonHelper.save_json(encode_live(live), path, compact=True)
+
+
+###########################################################################
+# reactions.json
+###########################################################################
+def decode_reactions(data: dict[str, Any]) -> dict[str, dict[int, ReactionMenu]]:
+    """Reads reactions.json in any version into env -> message id -> menu."""
+    if data.get("version") == STATE_VERSION:
+        return {
+            env: {
+                int(message_id): ReactionMenu(dict(roles)) for message_id, roles in menus.items()
+            }
+            for env, menus in data["menus"].items()
+        }
+
+    return {
+        env: {
+            int(message_id): ReactionMenu(
+                {emoji: int(role_id) for emoji, role_id in menu["reactions"].items()}
+            )
+            for message_id, menu in menus.items()
+        }
+        for env, menus in data.items()
+    }
+
+
+def encode_reactions(reactions: dict[str, dict[int, ReactionMenu]]) -> dict[str, Any]:
+    return {
+        "version": STATE_VERSION,
+        "menus": {
+            env: {str(message_id): menu.roles for message_id, menu in menus.items()}
+            for env, menus in reactions.items()
+        },
+    }
+
+
+def save_reactions(reactions: dict[str, dict[int, ReactionMenu]], path: str) -> None:
+    JsonHelper.save_json(encode_reactions(reactions), path, compact=True)
+
+
+def _replace_reactions(
+    reactions: dict[str, dict[int, ReactionMenu]], fresh: dict[str, dict[int, ReactionMenu]]
+) -> None:
+    # In place, since cogs hold on to the per-env dicts.
+    for env, menus in fresh.items():
+        target = reactions.setdefault(env, {})
+        target.clear()
+        target.update(menus)
+
+
+def reload_reactions(reactions: dict[str, dict[int, ReactionMenu]], path: str) -> None:
+    """Refreshes reactions with the menus other processes sharing path saved."""
+    _replace_reactions(reactions, decode_reactions(JsonHelper.load_json(path)))
+
+
+def update_reactions(
+    reactions: dict[str, dict[int, ReactionMenu]],
+    env: str,
+    path: str,
+    change: Callable[[dict[int, ReactionMenu]], None],
+) -> None:
+    """Applies change to env's menus as saved in path, saves them and refreshes reactions.
+
+    The file is read and written under a lock, so shard processes sharing a state directory
+    never overwrite each other's menus with a stale copy."""
+
+    def update(data: dict[str, Any] | None) -> dict[str, Any]:
+        current = decode_reactions(data or {})
+        change(current.setdefault(env, {}))
+        fresh.update(current)
+        return encode_reactions(current)
+
+    fresh: dict[str, dict[int, ReactionMenu]] = {}
+    JsonHelper.update_json(path, update, compact=True)
+    _replace_reactions(reactions, fresh)
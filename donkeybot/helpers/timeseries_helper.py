@@ -0,0 +1,215 @@
+import base64
+import json
+import os
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+# Minute samples kept per live session: two days, 32 KiB of arrays per session.
+SESSION_CAPACITY = 2880
+
+_SPARKS = "▁▂▃▄▅▆▇█"
+
+
+class RingSeries:
+    """Fixed-capacity (offset, value) samples in two unsigned int arrays.
+
+    Once full the oldest samples are overwritten; count, total and peak keep covering every
+    sample ever recorded, so averages stay exact for arbitrarily long sessions."""
+
+    __slots__ = ("capacity", "offsets", "values", "head", "count", "total", "peak")
+
+    def __init__(self, capacity: int = SESSION_CAPACITY) -> None:
+        self.capacity = capacity
+        self.offsets = array("I")
+        self.values = array("I")
+        self.head = 0
+        self.count = 0
+        self.total = 0
+        self.peak = 0
+
+    def append(self, offset: int, value: int) -> None:
+        if len(self.values) < self.capacity:
+            self.offsets.append(offset)
+            self.values.append(value)
+        else:
+            self.offsets[self.head] = offset
+            self.values[self.head] = value
+            self.head = (self.head + 1) % self.capacity
+        self.count += 1
+        self.total += value
+        self.peak = max(self.peak, value)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def ordered(self) -> tuple[array, array]:
+        """Returns the retained offsets and values, oldest first."""
+        head = self.head
+        return (
+            self.offsets[head:] + self.offsets[:head],
+            self.values[head:] + self.values[:head],
+        )
+
+
+@dataclass(slots=True)
+class StreamSession:
+    """Viewer counts, game changes and the latest title of one live stream."""
+
+    streamer: str
+    start: int
+    title: str = ""
+    last: int = 0
+    viewers: RingSeries = field(default_factory=RingSeries)
+    # (seconds since start, game) for the first game and every change after it
+    games: list[tuple[int, str]] = field(default_factory=list)
+
+    def record(self, now: int, viewers: int, game: str, title: str) -> None:
+        offset = max(0, now - self.start)
+        self.viewers.append(offset, max(0, viewers))
+        if not self.games or self.games[-1][1] != game:
+            self.games.append((offset, game))
+        self.title = title
+        self.last = now
+
+    @property
+    def length(self) -> int:
+        return max(0, (self.last or self.start) - self.start)
+
+    def to_record(self) -> dict[str, Any]:
+        offsets, values = self.viewers.ordered()
+        return {
+            "streamer": self.streamer,
+            "start": self.start,
+            "end": self.last or self.start,
+            "title": self.title,
+            "peak": self.viewers.peak,
+            "average": round(self.viewers.average, 1),
+            "samples": self.viewers.count,
+            "total": self.viewers.total,
+            "games": self.games,
+            "offsets": base64.b64encode(offsets.tobytes()).decode(),
+            "viewers": base64.b64encode(values.tobytes()).decode(),
+        }
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "StreamSession":
+        """Rebuilds a session saved with to_record, e.g. one still live at shutdown."""
+        viewers = RingSeries()
+        viewers.offsets.frombytes(base64.b64decode(record["offsets"]))
+        viewers.values = decode_viewers(record)
+        viewers.count = record["samples"]
+        viewers.total = record["total"]
+        viewers.peak = record["peak"]
+        return cls(
+            streamer=record["streamer"],
+            start=record["start"],
+            title=record["title"],
+            last=record["end"],
+            viewers=viewers,
+            games=[(offset, game) for offset, game in record["games"]],
+        )
+
+
+class SessionSummary(NamedTuple):
+    start: int
+    end: int
+    peak: int
+    average: float
+    samples: int
+    game: str
+    # where the full record starts in the log, to read its samples back on demand
+    position: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+
+def decode_viewers(record: dict[str, Any]) -> array:
+    values = array("I")
+    values.frombytes(base64.b64decode(record["viewers"]))
+    return values
+
+
+def sparkline(values: "array | list[int]", width: int = 24) -> str:
+    """Draws values as block characters, averaging them down to at most width columns."""
+    if not values:
+        return ""
+    step = max(1, -(-len(values) // width))
+    columns = [
+        sum(values[i : i + step]) / len(values[i : i + step]) for i in range(0, len(values), step)
+    ]
+    low, high = min(columns), max(columns)
+    scale = (len(_SPARKS) - 1) / (high - low) if high > low else 0
+    return "".join(_SPARKS[int((value - low) * scale)] for value in columns)
+
+
+class SessionLog:
+    """Append-only JSON lines log of finished sessions with a per-streamer summary index.
+
+    Only summaries are kept in memory; a session's samples are read back from the file when
+    asked for. load(), write() and read() do file I/O and are meant to run off the event loop,
+    with add() indexing the written record back on it."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.index: dict[str, list[SessionSummary]] = {}
+        # lowercased login -> name as it was last recorded
+        self.names: dict[str, str] = {}
+
+    def load(self) -> None:
+        """Indexes every session already in the log."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            position = 0
+            for line in f:
+                try:
+                    self.add(json.loads(line), position)
+                except (ValueError, KeyError):
+                    # A line cut short by a crash; the next append starts on a new line.
+                    pass
+                position += len(line)
+
+    def add(self, record: dict[str, Any], position: int) -> None:
+        games = record["games"]
+        key = record["streamer"].lower()
+        self.names[key] = record["streamer"]
+        self.index.setdefault(key, []).append(
+            SessionSummary(
+                start=record["start"],
+                end=record["end"],
+                peak=record["peak"],
+                average=record["average"],
+                samples=record["samples"],
+                game=games[-1][1] if games else "",
+                position=position,
+            )
+        )
+
+    def write(self, record: dict[str, Any]) -> int:
+        """Appends record and returns the position it was written at."""
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        with open(self.path, "ab") as f:
+            position = f.tell()
+            if position and not self._ends_with_newline(self.path, position):
+                f.write(b"\n")
+                position += 1
+            f.write(line)
+        return position
+
+    @staticmethod
+    def _ends_with_newline(path: str, size: int) -> bool:
+        with open(path, "rb") as f:
+            f.seek(size - 1)
+            return f.read(1) == b"\n"
+
+    def sessions(self, streamer: str) -> list[SessionSummary]:
+        return self.index.get(streamer.lower(), [])
+
+    def read(self, summary: SessionSummary) -> dict[str, Any]:
+        with open(self.path, "rb") as f:
+            f.seek(summary.position)
+            return json.loads(f.readline())
@@ -0,0 +1,12 @@
+from discord import Interaction, app_commands
+
+from donkeybot.helpers.rest_helper import Priority, set_rest_priority
+
+
+class DonkeyTree(app_commands.CommandTree):
+    """Command tree whose commands send their Discord requests at interaction priority."""
+
+    async def interaction_check(self, interaction: Interaction, /) -> bool:
+        # Runs in the same task as the command callback, so the priority carries over to it.
+        set_rest_priority(Priority.INTERACTION)
+        return True
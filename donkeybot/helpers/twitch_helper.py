@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Mapping
+from urllib.parse import urlsplit
+
+from aiohttp import ClientResponse
+from twitchAPI.object.api import Stream
+from twitchAPI.twitch import Twitch
+
+from donkeybot.helpers.config_helper import TTV_BUDGET_LOW, TTV_CACHE_TTL
+from donkeybot.helpers.metrics_helper import TWITCH_API_CALLS, TWITCH_BUDGET_REMAINING
+
+
+class HelixBudget:
+    """Helix rate limit points left for one app id, as of the latest response's headers.
+
+    Twitch counts the bucket per app, so every bot and process sharing the app id draws from
+    it and the headers already include what the others spent."""
+
+    __slots__ = ("limit", "remaining", "reset")
+
+    def __init__(self) -> None:
+        # Helix's default bucket; replaced by the first response's headers.
+        self.limit = 800
+        self.remaining = 800
+        self.reset = 0.0
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        try:
+            limit = int(headers["Ratelimit-Limit"])
+            remaining = int(headers["Ratelimit-Remaining"])
+            reset = float(headers["Ratelimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        self.limit, self.remaining, self.reset = limit, remaining, reset
+
+    def left(self) -> int:
+        """Points left now; the bucket is full again once its reset time has passed."""
+        return self.limit if time.time() >= self.reset else self.remaining
+
+    @property
+    def low(self) -> bool:
+        return self.left() < self.limit * TTV_BUDGET_LOW
+
+    def describe(self) -> str:
+        left = self.left()
+        line = f"{left}/{self.limit} points left"
+        if left < self.limit:
+            line += f", refills in {max(0.0, self.reset - time.time()):.0f}s"
+        return line + (" (low)" if self.low else "")
+
+
+class InstrumentedTwitch(Twitch):
+    """Twitch client that counts every Helix response, including retries, by endpoint, and
+    tracks the app's rate limit budget from the response headers."""
+
+    async def _check_request_return(
+        self, session, response: ClientResponse, method: str, url: str, *args, **kwargs
+    ) -> ClientResponse:
+        endpoint = urlsplit(url).path.removeprefix("/helix/")
+        TWITCH_API_CALLS.inc((endpoint, str(response.status)))
+        TwitchHelper.budget(self.app_id).update(response.headers)
+        return await super()._check_request_return(
+            session, response, method, url, *args, **kwargs
+        )
+
+
+class TwitchHelper:
+    """Process-wide Twitch clients and stream lookups shared by every bot instance."""
+
+    _clients: dict[str, Twitch] = {}
+    _streams: dict[str, tuple[float, Stream | None]] = {}
+    _budgets: dict[str, HelixBudget] = {}
+    _lock = asyncio.Lock()
+
+    @classmethod
+    def budget(cls, app_id: str) -> HelixBudget:
+        budget = cls._budgets.get(app_id)
+        if budget is None:
+            budget = cls._budgets[app_id] = HelixBudget()
+            TWITCH_BUDGET_REMAINING.set_function(budget.left, (app_id[:8],))
+        return budget
+
+    @classmethod
+    async def get_client(cls, app_id: str, app_secret: str) -> Twitch:
+        """Returns the client for app_id, authenticating it on first use."""
+        async with cls._lock:
+            client = cls._clients.get(app_id)
+            if client is None:
+                client = await InstrumentedTwitch(app_id=app_id, app_secret=app_secret)
+                cls._clients[app_id] = client
+            return client
+
+    @classmethod
+    async def close_clients(cls) -> None:
+        for client in cls._clients.values():
+            await client.close()
+        cls._clients.clear()
+
+    @classmethod
+    async def get_streams(cls, client: Twitch, logins: list[str]) -> dict[str, Stream | None]:
+        """Returns the live stream of each login, or None when offline.
+
+        Lookups younger than TTV_CACHE_TTL are reused, and all stale logins are fetched in a
+        single request, so bots polling the same streamers share one Helix call."""
+        async with cls._lock:
+            now = time.monotonic()
+            misses = [
+                login
+                for login in logins
+                if now - cls._streams.get(login.lower(), (float("-inf"), None))[0]
+                >= TTV_CACHE_TTL
+            ]
+
+            if misses:
+                found: dict[str, Stream] = {}
+                async for stream in client.get_streams(user_login=misses, first=100):
+                    found[stream.user_login.lower()] = stream
+
+                fetched = time.monotonic()
+                for login in misses:
+                    cls._streams[login.lower()] = (fetched, found.get(login.lower()))
+
+            return {login: cls._streams[login.lower()][1] for login in logins}
+
+    @classmethod
+    async def live_user_ids(cls, client: Twitch, user_ids: list[str]) -> set[str]:
+        """Returns which of user_ids are live, in a single uncached request."""
+        live: set[str] = set()
+        async for stream in client.get_streams(user_id=user_ids, first=100):
+            live.add(stream.user_id)
+        return live
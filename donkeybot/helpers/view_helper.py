@@ -0,0 +1,52 @@
+from discord import ButtonStyle, Interaction, TextStyle, ui
+
+
+class ConfirmView(ui.View):
+    """Confirm/Cancel buttons that resolve from the button press of the invoking user."""
+
+    def __init__(self, user_id: int, timeout: float = 30) -> None:
+        super().__init__(timeout=timeout)
+        self.user_id = user_id
+        self.value: bool | None = None
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message(
+                "This confirmation is not for you.", ephemeral=True
+            )
+            return False
+        return True
+
+    async def _resolve(self, interaction: Interaction, value: bool) -> None:
+        self.value = value
+        await interaction.response.edit_message(view=None)
+        self.stop()
+
+    @ui.button(label="Confirm", style=ButtonStyle.success)
+    async def confirm(self, interaction: Interaction, button: ui.Button) -> None:
+        await self._resolve(interaction, True)
+
+    @ui.button(label="Cancel", style=ButtonStyle.secondary)
+    async def cancel(self, interaction: Interaction, button: ui.Button) -> None:
+        await self._resolve(interaction, False)
+
+
+class TextPromptModal(ui.Modal):
+    """Single text field modal; the submitting interaction is deferred for followups."""
+
+    def __init__(
+        self, title: str, label: str, max_length: int = 100, timeout: float = 120
+    ) -> None:
+        super().__init__(title=title, timeout=timeout)
+        self.value: str | None = None
+        self.interaction: Interaction | None = None
+        self.field: ui.TextInput = ui.TextInput(
+            label=label, style=TextStyle.short, max_length=max_length
+        )
+        self.add_item(self.field)
+
+    async def on_submit(self, interaction: Interaction) -> None:
+        self.value = self.field.value.strip()
+        self.interaction = interaction
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        self.stop()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime, timezone
+from types import FrameType
+
+from donkeybot.helpers.metrics_helper import LOOP_LAG_SECONDS
+
+_log = logging.getLogger("DonkeyBot.watchdog")
+
+
+class LoopWatchdog:
+    """Measures event loop lag and logs the loop thread's stack when a callback blocks it.
+
+    A task records how late each timer fires, while a thread checks that the task keeps
+    beating; when it stalls past the threshold the thread captures the loop's current frame."""
+
+    def __init__(self, threshold: float, interval: float = 0.1) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _measure(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            LOOP_LAG_SECONDS.observe(max(now - expected, 0.0))
+            self._beat = now
+
+    def _watch(self) -> None:
+        reported_beat = 0.0
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            stalled = time.monotonic() - beat
+            if stalled < self.threshold or beat == reported_beat:
+                continue
+
+            reported_beat = beat
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread or 0)
+            stack = "".join(traceback.format_stack(frame)) if frame else "unavailable\n"
+            _log.warning(
+                "Event loop blocked for %.3fs; loop thread stack:\n%slag histogram: %s",
+                stalled,
+                stack,
+                LOOP_LAG_SECONDS.summary(),
+            )
+
+
+class SamplingProfiler:
+    """Samples the event loop thread's stack and writes folded stacks for flamegraph tools."""
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self.started_at = 0.0
+        self._target: int | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @staticmethod
+    def _fold(frame: FrameType | None) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def start(self) -> None:
+        self.samples.clear()
+        self.started_at = time.time()
+        self._target = threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._target or 0)
+            if frame is not None:
+                self.samples[self._fold(frame)] += 1
+
+    def stop(self, directory: str = "logs/") -> str:
+        """Stops sampling and writes the folded stacks, returning the file path."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        timestamp = datetime.fromtimestamp(self.started_at, timezone.utc)
+        path = os.path.join(directory, f"profile_{timestamp:%Y-%m-%d_%H-%M-%S}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
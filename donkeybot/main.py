@@ -1,80 +1,227 @@
+import asyncio
 import logging
 import os
 import time
 from typing import Any
 
 import discord
-import sentry_sdk
-from discord import Intents
 from discord.ext import commands
 
+from donkeybot.helpers.aiohttp_helper import AIOHTTPHelper
 from donkeybot.helpers.config_helper import (
-    DISCORD_KEY,
-    ENV,
-    GUILD_ID,
-    ROLES_LIST,
-    SENTRY_SDK,
+    LOOP_LAG_THRESHOLD,
+    METRICS_HOST,
+    METRICS_PORT,
+    SHUTDOWN_GRACE,
+    BotConfig,
+    ConfigError,
 )
+from donkeybot.helpers.dedupe_helper import DedupeCache
 from donkeybot.helpers.embed_helper import EmbedCreator
-from donkeybot.helpers.setup_json import setup_json
+from donkeybot.helpers.intents_helper import (
+    PROFILES,
+    build_intents,
+    build_member_cache,
+    chunk_at_startup,
+)
+from donkeybot.helpers.metrics_helper import MetricsServer, discord_trace_config
+from donkeybot.helpers.reload_helper import ModuleTracker
+from donkeybot.helpers.rest_helper import RestScheduler
+from donkeybot.helpers.sentry_helper import ERRORS, init_sentry
 from donkeybot.helpers.setup_logging import setup_logging
+from donkeybot.helpers.shard_helper import ShardMonitor, gateway_position
+from donkeybot.helpers.shutdown_helper import PhaseTimer, WorkTracker, on_signals
+from donkeybot.helpers.tree_helper import DonkeyTree
+from donkeybot.helpers.twitch_helper import TwitchHelper
+from donkeybot.helpers.watchdog_helper import LoopWatchdog, SamplingProfiler
 
 
 class BotContext(EmbedCreator, commands.Context):
     bot: "DonkeyBot"
 
 
+def module_names() -> list[str]:
+    """Returns the names of every module under donkeybot/modules."""
+    modules_dir = os.path.join(os.path.dirname(__file__), "modules")
+    return [
+        file[:-3]
+        for file in sorted(os.listdir(modules_dir))
+        if file.endswith(".py") and not file.startswith("__")
+    ]
+
+
 class DonkeyBot(commands.Bot):
-    def __init__(self, **kwargs):
+    def __init__(self, config: BotConfig, standalone: bool = True, **kwargs):
+        """Set standalone to False when a runner owns the process-wide services instead."""
         setup_logging()
-        setup_json()
 
-        intent = Intents.default()
-        intent.message_content = True
-        intent.reactions = True
-        intent.members = True
-        intent.guilds = True
-
-        self._log = logging.getLogger("DonkeyBot")
+        self.config = config
+        self.standalone = standalone
+        self._log = logging.getLogger(config.name)
         self.case_insensitive = True
         self.start_time = time.time()
+        self.module_tracker = ModuleTracker()
+        self.work = WorkTracker()
+        self.dedupe = DedupeCache(config.name, config.dedupe_ttl, config.dedupe_max)
+        self._shutdown: asyncio.Task | None = None
+
+        self.memory_profile = config.memory_profile
+        if self.memory_profile not in PROFILES:
+            self._log.warning(f"Unknown memory profile {self.memory_profile}; using full")
+            self.memory_profile = "full"
+
+        intent = build_intents(module_names(), self.memory_profile)
+        self._log.info(f"Memory profile {self.memory_profile} with intents {intent.value}")
 
-        self.roles: dict[str, dict[str, Any]] = ROLES_LIST[ENV]
-        self._log.info("Bot successfully started...")
+        self.guild_objects = [discord.Object(id=guild_id) for guild_id in config.guilds]
+        self._log.info(f"Bot successfully started for {len(self.guild_objects)} guild(s)...")
 
-        if ENV == "primary":
-            sentry_sdk.init(
-                dsn=SENTRY_SDK,
-                send_default_pii=True,
-                traces_sample_rate=1.0,
-            )
+        if config.env == "primary":
+            init_sentry(config.sentry_dsn)
         else:
             self._log.info("Currently in dev mode; skipping Sentry...")
 
         super().__init__(
-            command_prefix="/", intents=intent, case_insensitive=True, **kwargs
+            command_prefix="/",
+            intents=intent,
+            case_insensitive=True,
+            member_cache_flags=build_member_cache(intent, self.memory_profile),
+            chunk_guilds_at_startup=chunk_at_startup(self.memory_profile),
+            http_trace=discord_trace_config(),
+            tree_cls=DonkeyTree,
+            **kwargs,
         )
 
+        self.rest = RestScheduler(config.name)
+        self.rest.install(self.http)
+
+        self.metrics_server: MetricsServer | None = None
+        self.watchdog: LoopWatchdog | None = None
+        self.profiler = SamplingProfiler()
+        self.shard_monitor = ShardMonitor(self, config.name)
+
+    def dispatch(self, event_name: str, /, *args: Any, **kwargs: Any) -> None:
+        if event_name in ("raw_reaction_add", "raw_reaction_clear") and self._redelivered(
+            event_name, args[0]
+        ):
+            return
+        super().dispatch(event_name, *args, **kwargs)
+
+    def _redelivered(
+        self,
+        event_name: str,
+        payload: discord.RawReactionActionEvent | discord.RawReactionClearEvent,
+    ) -> bool:
+        """Whether a role menu's reaction event was already dispatched, e.g. before a RESUME.
+
+        A replay would toggle the role straight back and DM the member again. It is keyed on
+        its gateway delivery, which a member reacting again never repeats."""
+        if payload.guild_id is None or payload.message_id not in self.config.reactions.get(
+            self.config.env, {}
+        ):
+            return False
+        position = gateway_position(self, payload.guild_id)
+        if position is None:
+            return False
+        return self.dedupe.seen(position, event_name.removeprefix("raw_"))
+
+    @property
+    def runs_loops(self) -> bool:
+        """Whether this process runs the background loops; with sharding only shard 0's does."""
+        shard_ids = self.config.shard_ids
+        return shard_ids is None or 0 in shard_ids
+
     async def setup_hook(self) -> None:
         """Loads modules after loading the bot."""
         self._log.info("setup_hook initialized...")
 
-        self.tree.clear_commands(guild=discord.Object(id=GUILD_ID))
+        if self.standalone and LOOP_LAG_THRESHOLD > 0:
+            self.watchdog = LoopWatchdog(LOOP_LAG_THRESHOLD)
+            self.watchdog.start()
+
+        for guild in self.guild_objects:
+            self.tree.clear_commands(guild=guild)
 
         self.base = BaseCommands(self)
         await self.add_cog(self.base)
 
-        modules_dir = os.path.join(os.path.dirname(__file__), "modules")
-        for file in os.listdir(modules_dir):
-            if file.endswith(".py") and not file.startswith("__"):
-                module_name = file[:-3]
-                try:
-                    await self.load_extension(f"donkeybot.modules.{module_name}")
-                    self._log.info(f"Loaded module {module_name}")
-                except commands.ExtensionError as e:
-                    self._log.error(f"Failed to load module {module_name}", exc_info=e)
-
-        await self.tree.sync(guild=discord.Object(id=GUILD_ID))
+        for module_name in module_names():
+            try:
+                await self.load_extension(f"donkeybot.modules.{module_name}")
+                self._log.info(f"Loaded module {module_name}")
+            except commands.ExtensionError as e:
+                self._log.error(f"Failed to load module {module_name}", exc_info=e)
+
+        self.module_tracker.snapshot()
+        self.shard_monitor.start()
+
+        if self.standalone and METRICS_PORT:
+            self.metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT)
+            await self.metrics_server.start()
+            self._log.info(f"Serving metrics on {METRICS_HOST}:{METRICS_PORT}/metrics")
+
+        await asyncio.gather(*(self.tree.sync(guild=guild) for guild in self.guild_objects))
+
+    async def close(self) -> None:
+        """Shuts down once, however many times close is called."""
+        if self._shutdown is None:
+            self._shutdown = asyncio.create_task(self._shut_down())
+        await asyncio.shield(self._shutdown)
+
+    async def _shut_down(self) -> None:
+        """Stops new work, drains in-flight work, flushes state, then closes connections."""
+        timer = PhaseTimer(self._log)
+
+        with timer.phase("stop intake"):
+            self.work.close()
+            self.shard_monitor.stop()
+
+        with timer.phase("drain"):
+            left = await self.work.drain(SHUTDOWN_GRACE)
+            if left:
+                self._log.warning(f"{left} jobs still running after {SHUTDOWN_GRACE:.0f}s")
+
+        with timer.phase("flush state"):
+            for cog in list(self.cogs.values()):
+                flush = getattr(cog, "flush_state", None)
+                if flush is not None:
+                    try:
+                        await flush()
+                    except Exception as error:
+                        self._log.exception(f"Could not flush {cog.qualified_name}", exc_info=error)
+
+        with timer.phase("close discord"):
+            await super().close()
+
+        # Clients that are kept alive across module reloads.
+        if self.standalone:
+            with timer.phase("close clients"):
+                if self.watchdog is not None:
+                    self.watchdog.stop()
+                if self.metrics_server is not None:
+                    await self.metrics_server.stop()
+                await TwitchHelper.close_clients()
+                await AIOHTTPHelper.close_session()
+                ERRORS.flush()
+
+        timer.summary()
+
+
+class ShardedDonkeyBot(DonkeyBot, commands.AutoShardedBot):
+    """DonkeyBot over several gateway connections, optionally only some shards per process."""
+
+
+def create_bot(config: BotConfig, **kwargs) -> DonkeyBot:
+    """Builds a sharded bot when SHARD_COUNT is set and a single-connection one otherwise."""
+    if not config.sharded:
+        return DonkeyBot(config, **kwargs)
+
+    return ShardedDonkeyBot(
+        config,
+        shard_count=config.shard_count or None,
+        shard_ids=config.shard_ids,
+        **kwargs,
+    )
 
 
 class BaseCommands(commands.Cog):
@@ -82,9 +229,20 @@ class BaseCommands(commands.Cog):
         self.bot = bot
 
 
+async def run(bot: DonkeyBot) -> None:
+    """Runs bot until it closes; SIGTERM and SIGINT start its graceful shutdown."""
+    async with bot:
+        on_signals(lambda: asyncio.ensure_future(bot.close()))
+        await bot.start(bot.config.discord_key)
+
+
 def main():
-    bot = DonkeyBot()
-    bot.run(DISCORD_KEY)
+    try:
+        config = BotConfig.from_env(os.environ)
+    except ConfigError as error:
+        raise SystemExit(f"Invalid configuration: {error}")
+    bot = create_bot(config)
+    asyncio.run(run(bot))
 
 
 if __name__ == "__main__":
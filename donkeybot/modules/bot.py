@@ -1,14 +1,31 @@
-import os
+import asyncio
 import random
-from typing import TYPE_CHECKING
+import time
+from typing import TYPE_CHECKING, Callable
 
-import discord
-from discord import Game, Interaction, Status, app_commands
+import aiohttp
+from discord import Game, HTTPException, Interaction, Status, app_commands
 from discord.ext import commands, tasks
 from discord.ext.commands import Cog
 
-from donkeybot.helpers.config_helper import GUILD_ID, STATUSES_LIST
+from donkeybot.helpers.aiohttp_helper import AIOHTTPHelper
+from donkeybot.helpers.auth_helper import is_admin
+from donkeybot.helpers.autocomplete_helper import (
+    AutocompleteIndex,
+    choices,
+    get_pfp_filenames,
+)
+from donkeybot.helpers.diagnostics_helper import (
+    format_bytes,
+    format_duration,
+    rss_bytes,
+)
+from donkeybot.helpers.embed_helper import EmbedCreator
+from donkeybot.helpers.image_helper import ImagePipeline, ImageRejected
 from donkeybot.helpers.json_helper import JsonHelper
+from donkeybot.helpers.rest_helper import Priority, RequestShed
+from donkeybot.helpers.twitch_helper import TwitchHelper
+from donkeybot.helpers.view_helper import ConfirmView, TextPromptModal
 
 if TYPE_CHECKING:
     from donkeybot.main import DonkeyBot
@@ -27,24 +44,42 @@ class ActivityCog(
 ):
     def __init__(self, bot: "DonkeyBot") -> None:
         self.bot = bot
-        self.gameslist: list[str] = STATUSES_LIST
+        self.gameslist: list[str] = bot.config.statuses
+        self.status_index = AutocompleteIndex(lambda: self.gameslist)
+        self.images = ImagePipeline("pfps")
 
     async def cog_load(self) -> None:
         self.bot.tree.add_command(
             self.main_cmd_group,
-            guild=discord.Object(id=GUILD_ID),
+            guilds=self.bot.guild_objects,
             override=True,
         )
-        self.status_loop.start()
-        # self.pfp_change.start()
+        if self.bot.runs_loops:
+            self.status_loop.start()
+            self.pfp_change.start()
 
     async def cog_unload(self) -> None:
         self.status_loop.cancel()
-        # self.pfp_change.cancel()
+        self.pfp_change.cancel()
+
+    def _update_statuses(self, change: Callable[[list[str]], list[str]]) -> None:
+        """Applies change to statuses.json as saved, keeping other shard processes' changes."""
+        self.gameslist[:] = JsonHelper.update_json(
+            self.bot.config.path("statuses.json"), change, default=[]
+        )
+        self.status_index.invalidate()
 
     @tasks.loop(minutes=60)
     async def status_loop(self) -> None:
-        """Changes the bot's status every 60 minutes."""
+        """Changes the bot's status every 60 minutes, skipping an hour when the bot is busy."""
+        if self.bot.rest.backlogged(Priority.COSMETIC):
+            return
+        if self.bot.config.shard_ids is not None:
+            # Shard processes sharing the state directory may have added or removed some.
+            self.gameslist[:] = await asyncio.to_thread(
+                JsonHelper.load_json, self.bot.config.path("statuses.json")
+            )
+            self.status_index.invalidate()
         game = Game(random.choice(self.gameslist))
         await self.bot.change_presence(activity=game, status=Status.online)
 
@@ -55,23 +90,35 @@ class ActivityCog(
         game = Game(random.choice(self.gameslist))
         await self.bot.change_presence(activity=game, status=Status.online)
 
+    async def change_pfp(self, pfp: str | None = None) -> str | None:
+        """Uploads a pre-rendered profile picture, random if pfp is None."""
+        sources = self.images.sources()
+        if self.bot.user is None or not sources:
+            return None
+
+        pfp = pfp or random.choice(sources)
+        try:
+            await self.bot.user.edit(avatar=await self.images.avatar(pfp))
+        except RequestShed:
+            return None
+        return pfp
+
     @tasks.loop(hours=24)
     async def pfp_change(self) -> None:
         """Changes the bot's profile picture every 24 hours."""
-        pfp = random.choice(os.listdir("pfps/"))
-
-        with open(f"pfps/{pfp}", "rb") as image:
-            if self.bot.user is not None:
-                await self.bot.user.edit(avatar=image.read())
+        try:
+            await self.change_pfp()
+        except (ImageRejected, HTTPException) as error:
+            self.bot._log.warning("Could not change the profile picture", exc_info=error)
 
     @pfp_change.before_loop
     async def before_pfp_change(self) -> None:
-        """Changes the bot's profile picture upon initialization."""
-        pfp = random.choice(os.listdir("pfps/"))
-
-        with open(f"pfps/{pfp}", "rb") as image:
-            if self.bot.user is not None:
-                await self.bot.user.edit(avatar=image.read())
+        """Renders every profile picture once, then changes it upon initialization."""
+        await self.bot.wait_until_ready()
+        failed = await self.images.prerender()
+        if failed:
+            self.bot._log.warning(f"{failed} profile pictures could not be rendered.")
+        await self.change_pfp()
 
     ###########################################################################
     # main_cmd_group Commands
@@ -92,23 +139,63 @@ class ActivityCog(
         )
 
     @main_cmd_group.command(
-        name="reload", description="Reload all modules loaded into DonkeyBot!"
+        name="reload", description="Reload modules that changed since they were loaded!"
+    )
+    @app_commands.describe(
+        dry_run="If True, only list the modules that would be reloaded.",
+        force="If True, reload every module even if it did not change.",
     )
-    async def reload(self, interaction: Interaction) -> None:
-        """Reload all modules loaded into DonkeyBot!"""
+    async def reload(
+        self, interaction: Interaction, dry_run: bool = False, force: bool = False
+    ) -> None:
+        """Reload modules that changed since they were loaded!"""
         await interaction.response.defer(thinking=True, ephemeral=True)
 
-        extension_names = list(self.bot.extensions.keys())
+        tracker = self.bot.module_tracker
+        plan = tracker.plan(list(self.bot.extensions.keys()), force=force)
+
+        notes = []
+        if plan.restart_required:
+            notes.append(
+                f"Restart required for: {', '.join(plan.restart_required)}"
+            )
+
+        if dry_run or plan.empty:
+            lines = [f"Helpers: {', '.join(plan.helpers) or 'none'}"]
+            lines.append(f"Modules: {', '.join(plan.extensions) or 'none'}")
+            header = "Would reload:" if dry_run else "Nothing changed; no modules reloaded."
+            await interaction.followup.send(
+                "\n".join([header, *lines, *notes]), ephemeral=True
+            )
+            return
+
+        try:
+            tracker.reload_helpers(plan)
+        except Exception as e:
+            self.bot._log.error("Failed to reload helpers; ignoring", exc_info=e)
+            await interaction.followup.send(
+                "Helpers failed to reload. See log for errors.", ephemeral=True
+            )
+            return
+
         failed = []
-        for extension in extension_names:
+        for extension in plan.extensions:
             try:
                 await self.bot.reload_extension(extension, package="modules")
                 self.bot._log.info(f"Reloaded {extension}...")
             except commands.ExtensionError:
                 self.bot._log.error(f"Failed to load {extension}; ignoring")
                 failed.append(extension)
+
+        tracker.commit(
+            plan.helpers + [e for e in plan.extensions if e not in failed]
+        )
+
         if not failed:
-            await interaction.followup.send("Modules reloaded!", ephemeral=True)
+            reloaded = ", ".join(plan.helpers + plan.extensions)
+            await interaction.followup.send(
+                "\n".join([f"Reloaded: {reloaded}", *notes]), ephemeral=True
+            )
         else:
             await interaction.followup.send(
                 f"{', '.join(failed)} failed to reload. See log for errors.",
@@ -117,6 +204,63 @@ class ActivityCog(
 
     ###########################################################################
 
+    @main_cmd_group.command(
+        name="diagnostics", description="See DonkeyBot's memory, cache and gateway stats."
+    )
+    @is_admin()
+    async def diagnostics(self, interaction: Interaction) -> None:
+        """See DonkeyBot's memory, cache and gateway stats."""
+        guilds = self.bot.guilds
+        cached = sum(len(guild.members) for guild in guilds)
+        total = sum(guild.member_count or 0 for guild in guilds)
+        chunked = sum(1 for guild in guilds if guild.chunked)
+        intents = [name for name, enabled in self.bot.intents if enabled]
+
+        fields = {
+            "Memory profile": self.bot.memory_profile,
+            "RSS": format_bytes(rss_bytes()),
+            "Uptime": format_duration(time.time() - self.bot.start_time),
+            "Guilds": f"{len(guilds)} ({chunked} chunked)",
+            "Cached members": f"{cached} / {total}",
+            "Cached users": str(len(self.bot.users)),
+            "Gateway latency": f"{self.bot.latency * 1000:.0f} ms",
+            "Shards": self.bot.shard_monitor.describe(),
+            "REST queue": self.bot.rest.describe(),
+            "Dedupe": self.bot.dedupe.describe(),
+            "Twitch budget": TwitchHelper.budget(self.bot.config.ttv_id).describe(),
+            "Loop stalls": str(self.bot.watchdog.stalls if self.bot.watchdog else "off"),
+            "Intents": ", ".join(intents),
+        }
+
+        await interaction.response.send_message(
+            embed=EmbedCreator.diagnostics_embed(fields, footer=self.bot.config.name),
+            ephemeral=True,
+        )
+
+    @main_cmd_group.command(
+        name="profile", description="Start or stop sampling DonkeyBot's event loop."
+    )
+    @is_admin()
+    async def profile(self, interaction: Interaction) -> None:
+        """Start or stop sampling DonkeyBot's event loop."""
+        profiler = self.bot.profiler
+        if not profiler.running:
+            profiler.start()
+            await interaction.response.send_message(
+                "Profiler started. Run this command again to stop it.", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        path = await asyncio.to_thread(profiler.stop)
+        samples = sum(profiler.samples.values())
+        await interaction.followup.send(
+            f"Profiler stopped after {samples} samples. Folded stacks written to `{path}`.",
+            ephemeral=True,
+        )
+
+    ###########################################################################
+
     @main_cmd_group.command(
         name="status",
         description="Adds, removes, or force changes statuses for donkeybot.",
@@ -156,27 +300,24 @@ class ActivityCog(
                 )
                 return
 
+            view = ConfirmView(interaction.user.id)
             await interaction.response.send_message(
-                f"Are you sure you want me to set the status to:\n`{status}`\n"
-                "Reply with `yes` to confirm.",
+                f"Are you sure you want me to set the status to:\n`{status}`",
+                view=view,
                 ephemeral=True,
             )
 
-            def check(m: discord.Message) -> bool:
-                return m.author == interaction.user and m.channel == interaction.channel
-
-            try:
-                msg = await self.bot.wait_for("message", check=check, timeout=10)
-                if msg.content.lower() != "yes":
-                    await interaction.followup.send("Cancelled.", ephemeral=True)
-
-                await msg.delete()
-            except Exception:
+            if await view.wait():
+                await interaction.edit_original_response(view=None)
                 await interaction.followup.send(
                     "No confirmation received. Cancelled.", ephemeral=True
                 )
                 return
 
+            if not view.value:
+                await interaction.followup.send("Cancelled.", ephemeral=True)
+                return
+
             if force:
                 await self.bot.change_presence(activity=Game(name=status))
 
@@ -184,13 +325,14 @@ class ActivityCog(
                     f"Status updated to: `{status}`", ephemeral=True
                 )
 
-            if status not in self.gameslist:
-                self.gameslist.append(status)
-                JsonHelper.save_json(self.gameslist, "json/statuses.json")
+            self._update_statuses(
+                lambda current: current if status in current else [*current, status]
+            )
         elif action.value == "remove":
             if status in self.gameslist:
-                self.gameslist.remove(status)
-                JsonHelper.save_json(self.gameslist, "json/statuses.json")
+                self._update_statuses(
+                    lambda current: [existing for existing in current if existing != status]
+                )
 
                 await interaction.response.send_message(
                     f"{status} has been removed successfully.", ephemeral=True
@@ -208,9 +350,17 @@ class ActivityCog(
                 f"New random status set: `{game.name}`", ephemeral=True
             )
 
-    ###########################################################################
+    @status.autocomplete("status")
+    async def status_autocomplete(
+        self, interaction: Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        """Suggests existing statuses, except when adding a new one."""
+        if interaction.namespace.action == "add":
+            return []
+        return choices(self.status_index.search(current))
 
-    """ @main_cmd_group.command(
+    ###########################################################################
+    @main_cmd_group.command(
         name="pfp",
         description="Adds or force change profile pictures for donkeybot.",
     )
@@ -226,75 +376,73 @@ class ActivityCog(
         ]
     )
     @app_commands.autocomplete(pfp=get_pfp_filenames)
+    @is_admin()
     async def pfp(
         self,
         interaction: Interaction,
         action: app_commands.Choice[str],
-        image_url: str | None,
-        pfp: str | None,
+        image_url: str | None = None,
+        pfp: str | None = None,
     ) -> None:
-        ""Adds or force change profile pictures for donkeybot.""
-        await interaction.response.defer(thinking=True, ephemeral=True)
-
+        """Adds or force change profile pictures for donkeybot."""
         if action.value == "add":
             if not image_url:
-                await interaction.followup.send(
+                await interaction.response.send_message(
                     "`image_url` is required for adding.", ephemeral=True
                 )
                 return
 
-            url_parts = urlparse(image_url)
-            file_extension = os.path.splitext(url_parts.path)[1]
+            modal = TextPromptModal(
+                title="Add profile picture",
+                label="What do you want the name of the filename to be?",
+            )
+            await interaction.response.send_modal(modal)
+
+            if await modal.wait() or modal.interaction is None or not modal.value:
+                return
+
+            followup = modal.interaction.followup
+            new_filename = modal.value
 
-            if file_extension.lower() in (".jpg", ".png"):
+            try:
                 response = await AIOHTTPHelper.get(
                     url=image_url,
                     headers=None,
                 )
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                response = None
 
-                if not response.ok:
-                    return
+            if response is None or not response.ok or not isinstance(response.data, bytes):
+                await followup.send("Could not download that image.", ephemeral=True)
+                return
 
-                image = Image.open(BytesIO(response.data))
-                image = image.resize((128, 128))
+            try:
+                filename = await self.images.store(new_filename, response.data)
+            except ImageRejected as error:
+                await followup.send(str(error), ephemeral=True)
+                return
 
-                await interaction.followup.send(
-                    "What do you want the name of the filename to be?",
-                    ephemeral=True,
+            await followup.send(
+                f"{filename} has been successfully added!",
+                ephemeral=True,
+            )
+        else:
+            if pfp is not None and pfp not in self.images.sources():
+                await interaction.response.send_message(
+                    f"There is no profile picture called `{pfp}`.", ephemeral=True
                 )
+                return
 
-                def check(m: discord.Message) -> bool:
-                    return (
-                        m.author == interaction.user
-                        and m.channel == interaction.channel
-                    )
-
-                try:
-                    msg = await self.bot.wait_for("message", check=check, timeout=10)
-                    new_filename = msg.content
-                    await msg.delete()
-
-                    image.save(f"pfps/{new_filename}{file_extension}")
-
-                    await interaction.followup.send(
-                        f"{new_filename} has been successfully added!",
-                        ephemeral=True,
-                    )
-                except Exception as e:
-                    await interaction.followup.send(
-                        "No confirmation received. Cancelled.",
-                        ephemeral=True,
-                    )
-                    self.bot._log.error(e)
-                    return
-        else:
-            if not pfp:
-                pfp = random.choice(os.listdir("pfps/"))
+            await interaction.response.defer(thinking=True, ephemeral=True)
 
-            with open(f"pfps/{pfp}", "rb") as image:
-                await self.bot.user.edit(avatar=image.read())
+            pfp = await self.change_pfp(pfp)
+            if pfp is None:
+                await interaction.followup.send(
+                    "No profile picture could be set right now.", ephemeral=True
+                )
+                return
 
             await interaction.followup.send(
                 f"Successfully changed to {pfp}!",
                 ephemeral=True,
-            ) """
+            )
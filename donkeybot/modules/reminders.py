@@ -0,0 +1,283 @@
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING, Hashable, TypedDict, cast
+
+import discord
+from discord import Interaction, app_commands
+from discord.ext import tasks
+from discord.ext.commands import Cog
+
+from donkeybot.helpers.json_helper import JsonHelper
+from donkeybot.helpers.scheduler_helper import HeapScheduler
+
+if TYPE_CHECKING:
+    from donkeybot.main import DonkeyBot
+
+MAX_PER_USER = 25
+MAX_DURATION = 365 * 24 * 60 * 60
+MAX_MESSAGE = 500
+
+_DURATION_PART = re.compile(r"(\d+)\s*([dhms])", re.IGNORECASE)
+_UNITS = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+class Reminder(TypedDict):
+    user_id: int
+    channel_id: int
+    message: str
+    due: float
+    created: float
+
+
+async def setup(bot: "DonkeyBot") -> None:
+    await bot.add_cog(ReminderCog(bot))
+
+
+async def teardown(bot: "DonkeyBot") -> None:
+    await bot.remove_cog("Reminders")
+
+
+def _parse_duration(value: str) -> int | None:
+    """Parses durations such as 90m, 1h30m or 2d into seconds."""
+    parts = _DURATION_PART.findall(value)
+    if not parts or _DURATION_PART.sub("", value).strip():
+        return None
+    return sum(int(amount) * _UNITS[unit.lower()] for amount, unit in parts)
+
+
+class ReminderCog(Cog, name="Reminders", description="Manages DonkeyBot's reminders"):
+    def __init__(self, bot: "DonkeyBot") -> None:
+        self.bot = bot
+        self.reminders: dict[str, Reminder] = cast(dict[str, Reminder], bot.config.reminders)
+        self.scheduler = HeapScheduler(self._deliver)
+        self._by_user: dict[int, set[str]] = {}
+        self._next_id = max((int(k) for k in self.reminders), default=0) + 1
+        self._dirty = False
+        # Keeps the save loop and flush_state from writing reminders.json at the same time.
+        self._save_lock = asyncio.Lock()
+
+    async def cog_load(self) -> None:
+        self.bot.tree.add_command(
+            self.remind_group,
+            guilds=self.bot.guild_objects,
+            override=True,
+        )
+        # With sharding over several processes, only shard 0's owns reminders.json and delivers.
+        if not self.bot.runs_loops:
+            return
+
+        for reminder_id, reminder in self.reminders.items():
+            self._by_user.setdefault(reminder["user_id"], set()).add(reminder_id)
+            self.scheduler.push(reminder["due"], reminder_id)
+
+        self.save_loop.start()
+
+    async def cog_unload(self) -> None:
+        self.scheduler.stop()
+        # Flushed before cancelling so a save the loop has in progress finishes first.
+        await self.flush_state()
+        self.save_loop.cancel()
+
+    async def flush_state(self) -> None:
+        """Writes pending reminder changes right away, e.g. on shutdown."""
+        if self.bot.runs_loops:
+            await self._save()
+
+    async def _save(self) -> None:
+        """Writes reminders.json in a thread if anything changed, after any save in progress."""
+        async with self._save_lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            await asyncio.to_thread(
+                JsonHelper.save_json, dict(self.reminders), self.bot.config.path("reminders.json")
+            )
+
+    @tasks.loop(seconds=30)
+    async def save_loop(self) -> None:
+        """Writes pending reminder changes in one go instead of on every command."""
+        await self._save()
+
+    @save_loop.before_loop
+    async def before_save_loop(self) -> None:
+        """Starts delivery once connected so overdue reminders are caught up right away."""
+        await self.bot.wait_until_ready()
+        self.scheduler.start()
+
+    def _remove(self, reminder_id: str) -> Reminder | None:
+        reminder = self.reminders.pop(reminder_id, None)
+        if reminder is not None:
+            user_ids = self._by_user.get(reminder["user_id"], set())
+            user_ids.discard(reminder_id)
+            if not user_ids:
+                self._by_user.pop(reminder["user_id"], None)
+            self._dirty = True
+        return reminder
+
+    async def _unavailable(self, interaction: Interaction) -> bool:
+        """Turns the command away in processes that do not run shard 0, which owns reminders."""
+        if self.bot.runs_loops:
+            return False
+        await interaction.response.send_message(
+            "Reminders are unavailable in this server right now.", ephemeral=True
+        )
+        return True
+
+    async def _deliver(self, batch: list[Hashable]) -> None:
+        """Sends every due reminder in the batch with one message per channel."""
+        # Reminders that come due during shutdown stay saved and are delivered after restart.
+        if not self.bot.work.accepting:
+            return
+        with self.bot.work.job():
+            await self._deliver_batch(batch)
+
+    async def _deliver_batch(self, batch: list[Hashable]) -> None:
+        now = time.time()
+        by_channel: dict[int, list[Reminder]] = {}
+        for reminder_id in batch:
+            reminder = self._remove(cast(str, reminder_id))
+            if reminder is not None:
+                by_channel.setdefault(reminder["channel_id"], []).append(reminder)
+
+        results = await asyncio.gather(
+            *(self._send(channel_id, items, now) for channel_id, items in by_channel.items()),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self.bot._log.exception("REMINDER_EXCEPTION", exc_info=result)
+
+    async def _send(self, channel_id: int, items: list[Reminder], now: float) -> None:
+        lines = []
+        for reminder in items:
+            line = f"<@{reminder['user_id']}> reminder: {reminder['message']}"
+            if now - reminder["due"] > 60:
+                line += f" (was due <t:{int(reminder['due'])}:R>)"
+            lines.append(line)
+
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            try:
+                channel = await self.bot.fetch_channel(channel_id)
+            except (discord.NotFound, discord.Forbidden):
+                channel = None
+
+        if not isinstance(channel, discord.abc.Messageable):
+            for reminder in items:
+                user = await self.bot.fetch_user(reminder["user_id"])
+                await user.send(f"Reminder: {reminder['message']}")
+            return
+
+        # Only the reminded members are pinged, whatever mentions the reminder text holds.
+        mentions = discord.AllowedMentions(
+            everyone=False,
+            roles=False,
+            replied_user=False,
+            users=[discord.Object(id=reminder["user_id"]) for reminder in items],
+        )
+        chunk = ""
+        for line in lines:
+            if chunk and len(chunk) + len(line) + 1 > 2000:
+                await channel.send(chunk, allowed_mentions=mentions)
+                chunk = ""
+            chunk = f"{chunk}\n{line}" if chunk else line
+        if chunk:
+            await channel.send(chunk, allowed_mentions=mentions)
+
+    ###########################################################################
+    # remind_group Commands
+    ###########################################################################
+    remind_group = app_commands.Group(name="remind", description="Set and manage reminders.")
+
+    @remind_group.command(name="set", description="Get a reminder in this channel later.")
+    @app_commands.describe(
+        when="How long from now, such as 10m, 1h30m or 2d.",
+        message="What you want to be reminded about.",
+    )
+    async def remind_set(self, interaction: Interaction, when: str, message: str) -> None:
+        """Get a reminder in this channel later."""
+        if await self._unavailable(interaction):
+            return
+        seconds = _parse_duration(when)
+        if seconds is None or not 0 < seconds <= MAX_DURATION:
+            await interaction.response.send_message(
+                f"`{when}` is not a valid duration. Use something like 10m, 1h30m or 2d "
+                "(at most 365d).",
+                ephemeral=True,
+            )
+            return
+
+        if len(message) > MAX_MESSAGE:
+            await interaction.response.send_message(
+                f"Reminders can be at most {MAX_MESSAGE} characters long.", ephemeral=True
+            )
+            return
+
+        user_ids = self._by_user.setdefault(interaction.user.id, set())
+        if len(user_ids) >= MAX_PER_USER:
+            await interaction.response.send_message(
+                f"You already have {MAX_PER_USER} pending reminders.", ephemeral=True
+            )
+            return
+
+        reminder_id = str(self._next_id)
+        self._next_id += 1
+
+        now = time.time()
+        reminder: Reminder = {
+            "user_id": interaction.user.id,
+            "channel_id": interaction.channel_id or 0,
+            "message": message,
+            "due": now + seconds,
+            "created": now,
+        }
+        self.reminders[reminder_id] = reminder
+        user_ids.add(reminder_id)
+        self.scheduler.push(reminder["due"], reminder_id)
+        self._dirty = True
+
+        await interaction.response.send_message(
+            f"Reminder #{reminder_id} set for <t:{int(reminder['due'])}:f>.", ephemeral=True
+        )
+
+    @remind_group.command(name="list", description="See your pending reminders.")
+    async def remind_list(self, interaction: Interaction) -> None:
+        """See your pending reminders."""
+        if await self._unavailable(interaction):
+            return
+        reminder_ids = sorted(
+            self._by_user.get(interaction.user.id, set()),
+            key=lambda r: self.reminders[r]["due"],
+        )
+        if not reminder_ids:
+            await interaction.response.send_message(
+                "You have no pending reminders.", ephemeral=True
+            )
+            return
+
+        lines = [
+            f"#{r}: <t:{int(self.reminders[r]['due'])}:R> {self.reminders[r]['message'][:80]}"
+            for r in reminder_ids
+        ]
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
+    @remind_group.command(name="cancel", description="Cancel one of your reminders.")
+    @app_commands.describe(reminder="Number of the reminder, as shown by /remind list.")
+    async def remind_cancel(self, interaction: Interaction, reminder: int) -> None:
+        """Cancel one of your reminders."""
+        if await self._unavailable(interaction):
+            return
+        reminder_id = str(reminder)
+        if reminder_id not in self._by_user.get(interaction.user.id, set()):
+            await interaction.response.send_message(
+                f"You have no reminder #{reminder_id}.", ephemeral=True
+            )
+            return
+
+        self._remove(reminder_id)
+        self.scheduler.discard(reminder_id)
+
+        await interaction.response.send_message(
+            f"Reminder #{reminder_id} cancelled.", ephemeral=True
+        )
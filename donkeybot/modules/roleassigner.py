@@ -1,12 +1,23 @@
 import asyncio
-from typing import TYPE_CHECKING, Any
+import time
+from typing import TYPE_CHECKING
 
 import discord
 from discord import Interaction, TextChannel, app_commands
+from discord.ext import tasks
 from discord.ext.commands import Cog
 
-from donkeybot.helpers.config_helper import ENV, GUILD_ID, REACTIONS_LIST
-from donkeybot.helpers.json_helper import JsonHelper
+from donkeybot.helpers.auth_helper import is_admin
+from donkeybot.helpers.autocomplete_helper import AutocompleteIndex, choices
+from donkeybot.helpers.ledger_helper import RoleLedger
+from donkeybot.helpers.metrics_helper import REACTION_HANDLER_SECONDS
+from donkeybot.helpers.rest_helper import (
+    Priority,
+    RequestShed,
+    rest_priority,
+    set_rest_priority,
+)
+from donkeybot.helpers.state_helper import ReactionMenu, reload_reactions, update_reactions
 
 if TYPE_CHECKING:
     from donkeybot.main import DonkeyBot
@@ -23,20 +34,49 @@ async def teardown(bot: "DonkeyBot") -> None:
 class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messages."):
     def __init__(self, bot: "DonkeyBot") -> None:
         self.bot = bot
-        self.reactions_list: dict[str, dict[str, Any]] = REACTIONS_LIST[ENV]
+        # message id -> menu; shared with bot.config.reactions, which saves every env
+        self.reactions_list: dict[int, ReactionMenu] = bot.config.reactions.setdefault(
+            bot.config.env, {}
+        )
+        self.message_index = AutocompleteIndex(lambda: map(str, self.reactions_list))
+        self.ledger = RoleLedger(bot.config.path("ledger"))
+        # Keeps flushes from the loop, /reaction trends and unloading in the order they started.
+        self._flush_lock = asyncio.Lock()
 
     async def cog_load(self) -> None:
         self.bot.tree.add_command(
             self.reaction_group,
-            guild=discord.Object(id=GUILD_ID),
+            guilds=self.bot.guild_objects,
             override=True,
         )
+        self.ledger_loop.start()
 
     async def cog_unload(self) -> None:
-        self.bot.tree.remove_command(
-            self.reaction_group.name,
-            guild=discord.Object(id=GUILD_ID),
-        )
+        for guild in self.bot.guild_objects:
+            self.bot.tree.remove_command(self.reaction_group.name, guild=guild)
+        self.ledger_loop.cancel()
+        await self.flush_ledger()
+
+    async def flush_state(self) -> None:
+        await self.flush_ledger()
+
+    async def flush_ledger(self) -> None:
+        """Writes buffered role changes in a thread; they are kept for the next try on failure.
+
+        Waits for a flush already in progress first."""
+        async with self._flush_lock:
+            data = self.ledger.take()
+            if not data:
+                return
+            try:
+                await asyncio.to_thread(self.ledger.write, data)
+            except OSError as error:
+                self.ledger.restore(data)
+                self.bot._log.exception("Could not write the role ledger", exc_info=error)
+
+    @tasks.loop(seconds=15)
+    async def ledger_loop(self) -> None:
+        await self.flush_ledger()
 
     ###########################################################################
     # reaction_group Commands
@@ -70,6 +110,10 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
         role: discord.Role | None = None,
     ) -> None:
         """Set or removes reactions and roles from a specific message."""
+        config = self.bot.config
+        # Other shard processes may have changed menus since this one last saved.
+        reload_reactions(config.reactions, config.path("reactions.json"))
+
         channel = interaction.channel
         if not isinstance(channel, TextChannel):
             await interaction.response.send_message(
@@ -89,13 +133,13 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
             message_obj = await channel.fetch_message(int(message))
             await message_obj.add_reaction(emoji)
 
-            if message not in self.reactions_list:
-                self.reactions_list[message] = {"reactions": {}}
+            added = {emoji: role.id}
 
-            self.reactions_list[message]["reactions"][emoji] = role.id
-            REACTIONS_LIST[ENV] = self.reactions_list
+            def set_role(menus: dict[int, ReactionMenu]) -> None:
+                menus.setdefault(message_obj.id, ReactionMenu()).roles.update(added)
 
-            JsonHelper.save_json(REACTIONS_LIST, "json/reactions.json")
+            update_reactions(config.reactions, config.env, config.path("reactions.json"), set_role)
+            self.message_index.invalidate()
 
             await interaction.response.send_message(
                 f"{message} has received {emoji} as a reaction; when pressed, it will give {role}!",
@@ -104,6 +148,7 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
         else:
             try:
                 message_obj = await channel.fetch_message(int(message))
+                menu = self.reactions_list[message_obj.id]
 
                 if emoji or role:
                     if emoji:
@@ -111,9 +156,7 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
 
                     if role:
                         found_emoji: str | None = None
-                        for emoji_find, role_id in self.reactions_list[message][
-                            "reactions"
-                        ].items():
+                        for emoji_find, role_id in menu.roles.items():
                             if role_id == role.id and found_emoji:
                                 found_emoji = emoji_find
                                 await message_obj.clear_reaction(found_emoji)
@@ -125,20 +168,23 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
                             )
                             return
                         emoji = found_emoji
-
-                    self.reactions_list[message]["reactions"].pop(emoji, None)
-                    if len(self.reactions_list[message]["reactions"]) == 0:
-                        self.reactions_list.pop(message, None)
                 else:
-                    for reaction_emoji in self.reactions_list[message][
-                        "reactions"
-                    ].keys():
+                    for reaction_emoji in menu.roles:
                         await message_obj.clear_reaction(reaction_emoji)
 
-                    self.reactions_list.pop(message, None)
+                def remove(menus: dict[int, ReactionMenu]) -> None:
+                    found = menus.get(message_obj.id)
+                    if found is None:
+                        return
+                    if emoji:
+                        found.roles.pop(emoji, None)
+                    if not emoji or not found.roles:
+                        menus.pop(message_obj.id, None)
 
-                REACTIONS_LIST[ENV] = self.reactions_list
-                JsonHelper.save_json(REACTIONS_LIST, "json/reactions.json")
+                update_reactions(
+                    config.reactions, config.env, config.path("reactions.json"), remove
+                )
+                self.message_index.invalidate()
 
                 await interaction.response.send_message(
                     f"{message} successfully modified!", ephemeral=True
@@ -150,6 +196,62 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
                 )
                 self.bot._log.exception("REACTION_REMOVE_EXCEPTION", exc_info=e)
 
+    @reaction_group.command(
+        name="trends", description="See how many members joined and left a role each day."
+    )
+    @app_commands.describe(
+        role="Role to look up.",
+        days="How many days back to look, up to 90.",
+    )
+    @is_admin()
+    async def trends(
+        self,
+        interaction: Interaction,
+        role: discord.Role,
+        days: app_commands.Range[int, 1, 90] = 7,
+    ) -> None:
+        """See how many members joined and left a role each day."""
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        await self.flush_ledger()
+
+        until = int(time.time())
+        since = until - days * 86400
+        trend, joined = await asyncio.to_thread(
+            lambda: (
+                self.ledger.trend(role.id, since, until),
+                self.ledger.joined(role.id, since, until),
+            )
+        )
+
+        if not trend:
+            await interaction.followup.send(
+                f"No reaction changes to {role.mention} in the last {days} days.", ephemeral=True
+            )
+            return
+
+        lines = [
+            f"{day}  +{added:<4} -{removed:<4} net {added - removed:+}"
+            for day, (added, removed) in trend.items()
+        ]
+        added = sum(counts[0] for counts in trend.values())
+        removed = sum(counts[1] for counts in trend.values())
+        mentions = " ".join(f"<@{user_id}>" for user_id in joined[-30:])
+        more = f" and {len(joined) - 30} more" if len(joined) > 30 else ""
+        await interaction.followup.send(
+            f"**{role.name}**, last {days} days (UTC):\n```\n" + "\n".join(lines) + "\n```"
+            f"Total +{added} -{removed}, net {added - removed:+}. "
+            f"{len(joined)} joined and kept it: {mentions}{more}",
+            ephemeral=True,
+            allowed_mentions=discord.AllowedMentions.none(),
+        )
+
+    @reactions.autocomplete("message")
+    async def message_autocomplete(
+        self, interaction: Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        """Suggests messages that already have reaction roles."""
+        return choices(self.message_index.search(current))
+
     ###########################################################################
     # Listeners
     ###########################################################################
@@ -158,7 +260,40 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
     async def on_raw_reaction_add(
         self, payload: discord.RawReactionActionEvent
     ) -> None:
-        if payload.guild_id is None:
+        if not self.bot.work.accepting:
+            return
+        # Each listener runs in its own task, so this only applies to this event.
+        set_rest_priority(Priority.ROLE)
+        start = time.perf_counter()
+        try:
+            with self.bot.work.job():
+                await self._reaction_add(payload)
+        finally:
+            REACTION_HANDLER_SECONDS.observe(time.perf_counter() - start, ("add",))
+
+    @Cog.listener()
+    async def on_raw_reaction_clear(
+        self, payload: discord.RawReactionClearEvent
+    ) -> None:
+        if not self.bot.work.accepting:
+            return
+        set_rest_priority(Priority.ROLE)
+        start = time.perf_counter()
+        try:
+            with self.bot.work.job():
+                await self._reaction_clear(payload)
+        finally:
+            REACTION_HANDLER_SECONDS.observe(time.perf_counter() - start, ("clear",))
+
+    async def _reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        if payload.guild_id not in self.bot.config.guilds:
+            return
+
+        menu = self.reactions_list.get(payload.message_id)
+        if menu is None:
+            return
+        # The bot's own reactions are never role requests.
+        if self.bot.user is not None and payload.user_id == self.bot.user.id:
             return
 
         guild = self.bot.get_guild(payload.guild_id)
@@ -171,13 +306,7 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
 
         message = await channel.fetch_message(payload.message_id)
 
-        emoji_str = str(payload.emoji)
-        message_str = str(payload.message_id)
-
-        if message_str not in self.reactions_list:
-            return
-
-        role_id = self.reactions_list[message_str]["reactions"].get(emoji_str)
+        role_id = menu.roles.get(str(payload.emoji))
         if role_id is None:
             await message.clear_reaction(payload.emoji)
             return
@@ -186,7 +315,7 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
         if not role:
             return
 
-        member = guild.get_member(payload.user_id)
+        member = payload.member or guild.get_member(payload.user_id)
         if member is None:
             member = await guild.fetch_member(payload.user_id)
 
@@ -195,31 +324,40 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
 
         if role in member.roles:
             await member.remove_roles(role)
-            await member.send(
-                f"{role.name} role was removed from your profile successfully in {guild.name}."
+            self.ledger.record(guild.id, member.id, role.id, added=False)
+            await self._notify(
+                member,
+                f"{role.name} role was removed from your profile successfully in {guild.name}.",
             )
-            await asyncio.sleep(0.5)
         else:
             await member.add_roles(role)
-            await member.send(
-                f"{role.name} role was added to your profile successfully in {guild.name}."
+            self.ledger.record(guild.id, member.id, role.id, added=True)
+            await self._notify(
+                member,
+                f"{role.name} role was added to your profile successfully in {guild.name}.",
             )
-            await asyncio.sleep(0.5)
 
         await message.remove_reaction(payload.emoji, member)
         await message.add_reaction(payload.emoji)
 
-    @Cog.listener()
-    async def on_raw_reaction_clear(
-        self, payload: discord.RawReactionClearEvent
-    ) -> None:
-        message_id = str(payload.message_id)
-        if message_id in self.reactions_list:
+    async def _notify(self, member: discord.Member, content: str) -> None:
+        """DMs member about a role change; skipped when the REST scheduler sheds DMs."""
+        try:
+            with rest_priority(Priority.DM):
+                await member.send(content)
+        except RequestShed:
+            self.bot._log.info(f"Skipped role DM to {member.id}; DMs are backed up")
+            return
+        await asyncio.sleep(0.5)
+
+    async def _reaction_clear(self, payload: discord.RawReactionClearEvent) -> None:
+        menu = self.reactions_list.get(payload.message_id)
+        if menu is not None:
             self.bot._log.warning(
                 f"Someone cleared all reactions from {payload.message_id}. Readding reactions..."
             )
 
-            if payload.guild_id is None:
+            if payload.guild_id not in self.bot.config.guilds:
                 return
 
             guild = self.bot.get_guild(payload.guild_id)
@@ -233,5 +371,5 @@ class RoleCog(Cog, name="Roles", description="Manages DonkeyBot's reaction messa
             message = await channel.fetch_message(payload.message_id)
             await message.clear_reactions()
 
-            for reaction in self.reactions_list[message_id]["reactions"].keys():
+            for reaction in menu.roles:
                 await message.add_reaction(reaction)
@@ -1,43 +1,41 @@
+import asyncio
+import os
 import time
 from datetime import datetime
-from typing import TYPE_CHECKING, TypedDict, cast
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, cast
 from zoneinfo import ZoneInfo
 
 import discord
-import sentry_sdk
+from discord import Interaction, app_commands
 from discord.ext import tasks
 from discord.ext.commands import Cog
 from twitchAPI.helper import first
-from twitchAPI.twitch import Twitch
 from twitchAPI.type import SortMethod, VideoType
 
-from donkeybot.helpers.config_helper import (
-    LIVE_LIST,
-    STREAM_CHANNEL,
-    STREAM_OFF_THREAD,
-    STREAMER,
-    TTV_ID,
-    TTV_SCHEDULE_ENABLED,
-    TTV_SCHEDULE_END,
-    TTV_SCHEDULE_START,
-    TTV_TIMEOUT,
-    TTV_TOKEN,
-)
+from donkeybot.helpers.autocomplete_helper import AutocompleteIndex, choices
+from donkeybot.helpers.config_helper import TTV_LOW_BUDGET_INTERVAL
+from donkeybot.helpers.diagnostics_helper import format_duration
 from donkeybot.helpers.embed_helper import EmbedCreator
 from donkeybot.helpers.json_helper import JsonHelper
+from donkeybot.helpers.metrics_helper import ANNOUNCE_DELAY_SECONDS, STREAM_LOOP_SECONDS
+from donkeybot.helpers.rest_helper import Priority, RequestShed, rest_priority
+from donkeybot.helpers.sentry_helper import capture_error
+from donkeybot.helpers.state_helper import LiveStream, StreamPost, save_live
+from donkeybot.helpers.timeseries_helper import (
+    SessionLog,
+    SessionSummary,
+    StreamSession,
+    decode_viewers,
+    sparkline,
+)
+from donkeybot.helpers.twitch_helper import TwitchHelper
 
 if TYPE_CHECKING:
+    from donkeybot.helpers.config_helper import GuildConfig
     from donkeybot.main import DonkeyBot
 
-
-class LiveStream(TypedDict):
-    user_id: str
-    embed: int
-    role: int
-    game: str
-    thumbnail: str
-    pfp: str | None
-    check: int
+# Most messages read from one stream channel while reconciling after a restart.
+RECONCILE_SCAN_LIMIT = 500
 
 
 async def setup(bot: "DonkeyBot"):
@@ -53,161 +51,521 @@ class StreamingCog(
 ):
     def __init__(self, bot: "DonkeyBot") -> None:
         self.bot = bot
-        self.stream_role: int = int(self.bot.roles["admin"]["stream"])
-        self.live: dict[str, LiveStream] = cast(dict[str, LiveStream], LIVE_LIST)
-        self.stream_channel: discord.TextChannel
-        self.stream_thread: discord.TextChannel
+        self.live = bot.config.live
+        # streamer -> samples of the session in progress; written to the log when it ends and to
+        # open_sessions.json on shutdown so it resumes with its samples
+        self.sessions: dict[str, StreamSession] = {}
+        self.session_log = SessionLog(bot.config.path("sessions.jsonl"))
+        self.streamer_index = AutocompleteIndex(
+            lambda: [bot.config.streamer, *self.live, *self.session_log.names.values()]
+        )
+        # lowercased login -> profile picture URL, fetched ahead of go-live
+        self.profiles: dict[str, str | None] = {}
+        # guild id -> (stream channel, offline thread)
+        self.targets: dict[int, tuple[discord.TextChannel, discord.TextChannel]] = {}
+        self.budget = TwitchHelper.budget(bot.config.ttv_id)
+        self._last_tick = float("-inf")
+
+    async def _fetch_target(
+        self, guild: "GuildConfig"
+    ) -> tuple[discord.TextChannel, discord.TextChannel]:
+        channel, thread = await asyncio.gather(
+            self.bot.fetch_channel(guild.stream_channel),
+            self.bot.fetch_channel(guild.stream_thread),
+        )
+        return cast(discord.TextChannel, channel), cast(discord.TextChannel, thread)
 
     async def cog_load(self) -> None:
-        self.stream_channel = cast(
-            discord.TextChannel,
-            await self.bot.fetch_channel(STREAM_CHANNEL),
+        await asyncio.to_thread(self.session_log.load)
+        self.bot.tree.add_command(
+            self.stream_group,
+            guilds=self.bot.guild_objects,
+            override=True,
         )
-        self.stream_thread = cast(
-            discord.TextChannel,
-            await self.bot.fetch_channel(STREAM_OFF_THREAD),
+        if not self.bot.runs_loops:
+            return
+
+        await self._resume_sessions()
+
+        config = self.bot.config
+        subscribed = [guild for guild in config.guilds.values() if guild.streams]
+        targets = await asyncio.gather(
+            *(self._fetch_target(guild) for guild in subscribed), return_exceptions=True
         )
-        self.ttv_client = await Twitch(app_id=TTV_ID, app_secret=TTV_TOKEN)
+        for guild, target in zip(subscribed, targets):
+            if isinstance(target, BaseException):
+                self.bot._log.warning(
+                    "Could not fetch stream channels of guild %s", guild.guild_id, exc_info=target
+                )
+            else:
+                self.targets[guild.guild_id] = target
+
+        self.ttv_client = await TwitchHelper.get_client(config.ttv_id, config.ttv_token)
+
+        try:
+            await self._profile(config.streamer)
+            await self.reconcile()
+        except Exception as error:
+            self.bot._log.warning("Could not reconcile live streams", exc_info=error)
+            capture_error(error)
 
         self.stream_loop.start()
 
     async def cog_unload(self) -> None:
-        await self.ttv_client.close()
-
         self.stream_loop.cancel()
+        for guild in self.bot.guild_objects:
+            self.bot.tree.remove_command(self.stream_group.name, guild=guild)
+        await self.flush_state()
+
+    async def flush_state(self) -> None:
+        """Saves live.json and the sessions in progress on shutdown or reload, including
+        changes from a tick that did not finish."""
+        # Other shard processes never ran a tick; their copy would overwrite shard 0's.
+        if not self.bot.runs_loops:
+            return
+        save_live(self.live, self.bot.config.path("live.json"))
+        JsonHelper.save_json(
+            [session.to_record() for session in self.sessions.values() if session.viewers.count],
+            self.bot.config.path("open_sessions.json"),
+            compact=True,
+        )
 
     def _in_schedule(
         self,
     ) -> bool:
-        if not TTV_SCHEDULE_ENABLED:
+        config = self.bot.config
+        if not config.ttv_schedule_enabled:
             return True
         eastern_hour = datetime.now(ZoneInfo("America/New_York")).hour
-        return TTV_SCHEDULE_START <= eastern_hour < TTV_SCHEDULE_END
+        return config.ttv_schedule_start <= eastern_hour < config.ttv_schedule_end
+
+    ###########################################################################
+    # Per-guild fan-out
+    ###########################################################################
+    async def _fan_out(
+        self, action: Callable[[int], Awaitable[Any]], guild_ids: list[int]
+    ) -> dict[int, Any]:
+        """Runs action for every guild concurrently; a failing guild is logged and left out."""
+        results = await asyncio.gather(
+            *(action(guild_id) for guild_id in guild_ids), return_exceptions=True
+        )
+
+        done: dict[int, Any] = {}
+        for guild_id, result in zip(guild_ids, results):
+            if isinstance(result, BaseException):
+                self.bot._log.warning(
+                    "Stream update failed for guild %s", guild_id, exc_info=result
+                )
+                capture_error(result)
+            else:
+                done[guild_id] = result
+        return done
+
+    async def _profile(self, login: str) -> str | None:
+        """Returns the streamer's profile picture URL, from the cache unless it is missing."""
+        login = login.lower()
+        if login not in self.profiles:
+            user = await first(self.ttv_client.get_users(logins=[login]))
+            self.profiles[login] = (user.profile_image_url or None) if user else None
+        return self.profiles[login]
+
+    async def _announce(self, guild_id: int, embed: discord.Embed) -> StreamPost:
+        """Posts the embed and the role ping as one message, in a single request."""
+        channel, _ = self.targets[guild_id]
+        stream_role = self.bot.config.guilds[guild_id].stream_role
+        with rest_priority(Priority.ANNOUNCE):
+            message = await channel.send(
+                f"<@&{stream_role}>",
+                embed=embed,
+                allowed_mentions=discord.AllowedMentions(roles=[discord.Object(id=stream_role)]),
+            )
+        return StreamPost(message.id)
+
+    async def _refresh(self, guild_id: int, post: StreamPost, embed: discord.Embed) -> int:
+        """Edits the guild's announcement in place, reposting it if it was deleted."""
+        channel, _ = self.targets[guild_id]
+        if not post.embed:
+            with rest_priority(Priority.ANNOUNCE):
+                return (await channel.send(embed=embed)).id
+        try:
+            # Viewer counts and thumbnails can wait, or skip a tick, when the bot is busy.
+            with rest_priority(Priority.COSMETIC):
+                message = await channel.get_partial_message(post.embed).edit(embed=embed)
+        except RequestShed:
+            return post.embed
+        except discord.errors.NotFound:
+            with rest_priority(Priority.ANNOUNCE):
+                message = await channel.send(embed=embed)
+        return message.id
+
+    async def _retire(
+        self, guild_id: int, post: StreamPost, offline: discord.Embed | None
+    ) -> None:
+        _, thread = self.targets[guild_id]
+        if offline is not None:
+            await thread.send(embed=offline)
+
+        await self._delete(guild_id, [post.embed, post.role])
+
+    async def _delete(self, guild_id: int, message_ids: list[int]) -> None:
+        """Deletes messages from the guild's stream channel; 0 and missing ids are skipped."""
+        channel, _ = self.targets[guild_id]
+        for message_id in message_ids:
+            if not message_id:
+                continue
+            try:
+                await channel.get_partial_message(message_id).delete()
+            except discord.errors.NotFound:
+                pass
+
+    ###########################################################################
+    # Restart reconciliation
+    ###########################################################################
+    async def _existing(self, guild_id: int, message_ids: set[int]) -> set[int]:
+        """Returns which of message_ids are still in the guild's stream channel.
+
+        Reads the channel once, oldest first from the oldest id, and stops after the newest.
+        Ids past a scan cut short by RECONCILE_SCAN_LIMIT are assumed to exist."""
+        channel, _ = self.targets[guild_id]
+        newest = max(message_ids)
+        found: set[int] = set()
+        scanned = 0
+        last = 0
+        async for message in channel.history(
+            limit=RECONCILE_SCAN_LIMIT,
+            after=discord.Object(id=min(message_ids) - 1),
+            oldest_first=True,
+        ):
+            scanned += 1
+            last = message.id
+            if message.id in message_ids:
+                found.add(message.id)
+            if message.id >= newest:
+                return found
+
+        if scanned >= RECONCILE_SCAN_LIMIT:
+            found.update(message_id for message_id in message_ids if message_id > last)
+        return found
+
+    async def reconcile(self) -> None:
+        """Checks live.json against Twitch and the stream channels before the first tick.
+
+        Streams that ended while the bot was down are due for retirement on the first tick,
+        announcements whose embed was deleted are dropped so the tick posts them again, and
+        deleted role pings are forgotten instead of being deleted again."""
+        if not self.live:
+            return
+
+        # live.json is keyed by display name, which Helix does not look up; the user id is stable.
+        live_ids = await TwitchHelper.live_user_ids(
+            self.ttv_client, [stream.user_id for stream in self.live.values()]
+        )
+
+        by_guild: dict[int, set[int]] = {}
+        for messages in self.live.values():
+            for guild_id, post in messages.posts.items():
+                if guild_id in self.targets:
+                    ids = by_guild.setdefault(guild_id, set())
+                    ids.update(message_id for message_id in (post.embed, post.role) if message_id)
+        existing = await self._fan_out(
+            lambda guild_id: self._existing(guild_id, by_guild[guild_id]),
+            [guild_id for guild_id, ids in by_guild.items() if ids],
+        )
+
+        orphans: dict[int, list[int]] = {}
+        for user, messages in self.live.items():
+            online = messages.user_id in live_ids
+            if not online:
+                messages.check = self.bot.config.ttv_timeout
+
+            posts = messages.posts
+            for guild_id, post in list(posts.items()):
+                found = existing.get(guild_id)
+                if found is None:
+                    continue
+                if post.role not in found:
+                    post.role = 0
+                if post.embed not in found:
+                    post.embed = 0
+                    if online:
+                        posts.pop(guild_id)
+                        if post.role:
+                            orphans.setdefault(guild_id, []).append(post.role)
+
+            self.bot._log.info(
+                "Reconciled '%s': %s, %d announcements kept",
+                user,
+                "live" if online else "offline",
+                len(posts),
+            )
+
+        # A ping without its embed is removed too; the first tick announces both again.
+        await self._fan_out(
+            lambda guild_id: self._delete(guild_id, orphans[guild_id]), list(orphans)
+        )
+        save_live(self.live, self.bot.config.path("live.json"))
+
+    ###########################################################################
+    # Session statistics
+    ###########################################################################
+    async def _record(self, user: str, stream: Any) -> None:
+        started = int(stream.started_at.timestamp())
+        session = self.sessions.get(user)
+        if session is not None and session.start != started:
+            # Went offline and back live within TTV_TIMEOUT ticks: that is a new session.
+            await self._end_session(user)
+            session = None
+        if session is None:
+            # After a restart the session resumes from Twitch's start time, minus old samples.
+            session = self.sessions[user] = StreamSession(user, started)
+        session.record(int(time.time()), stream.viewer_count, stream.game_name, stream.title)
+
+    async def _resume_sessions(self) -> None:
+        """Picks up the sessions that were live at shutdown.
+
+        Ones whose stream is no longer tracked are logged right away, and _record ends the
+        ones that went live again under a new start time on the next tick."""
+        path = self.bot.config.path("open_sessions.json")
+        if not os.path.exists(path):
+            return
+        try:
+            records = await asyncio.to_thread(JsonHelper.load_json, path)
+            sessions = [StreamSession.from_record(record) for record in records]
+        except (ValueError, KeyError, TypeError) as error:
+            self.bot._log.warning("Could not resume stream sessions", exc_info=error)
+            return
+
+        for session in sessions:
+            self.sessions[session.streamer] = session
+            if session.streamer not in self.live:
+                await self._end_session(session.streamer)
+
+    async def _end_session(self, user: str) -> None:
+        session = self.sessions.pop(user, None)
+        if session is None or not session.viewers.count:
+            return
+        record = session.to_record()
+        position = await asyncio.to_thread(self.session_log.write, record)
+        self.session_log.add(record, position)
 
+    ###########################################################################
+    # Stream loop
+    ###########################################################################
     @tasks.loop(minutes=1)
     async def stream_loop(self) -> None:
+        if not self.bot.work.accepting:
+            return
         if not self._in_schedule() and not self.live:
             return
+        if self.budget.low and time.monotonic() - self._last_tick < TTV_LOW_BUDGET_INTERVAL:
+            self.bot._log.info(
+                "Helix budget low (%s); skipping stream check", self.budget.describe()
+            )
+            return
+        self._last_tick = time.monotonic()
 
-        try:
-            stream = await first(self.ttv_client.get_streams(user_login=[STREAMER]))
-            self.bot._log.info(f"Stream check for '{STREAMER}': {stream}")
-
-            if stream:
-                user = await first(self.ttv_client.get_users(logins=[STREAMER]))
-                try:
-                    self.live[stream.user_name]
-                except (KeyError, TypeError):
-                    if user:
-                        thumbnail = stream.thumbnail_url.replace(
-                            "{width}", "1280"
-                        ).replace("{height}", "720")
-
-                        e_thumbnail = thumbnail + "?rand=" + str(int(time.time()))
-
-                        embed_stream = await self.stream_channel.send(
-                            embed=EmbedCreator.twitch_embed(
-                                title=stream.title,
-                                stream_name=stream.user_name,
-                                stream_game=stream.game_name,
-                                viewer_count=stream.viewer_count,
-                                twitch_pfp=(
-                                    user.profile_image_url
-                                    if user and user.profile_image_url
-                                    else None
-                                ),
-                                thumbnail=e_thumbnail,
-                            )
-                        )
-                        role_msg = await self.stream_channel.send(
-                            f"<@&{self.stream_role}>"
-                        )
+        # Counted as in-flight work so a shutdown waits for posts and deletes to finish.
+        with self.bot.work.job():
+            await self._tick()
 
-                        self.live.update(
-                            {
-                                f"{stream.user_name}": {
-                                    "user_id": user.id,
-                                    "embed": embed_stream.id,
-                                    "role": role_msg.id,
-                                    "game": stream.game_name,
-                                    "thumbnail": thumbnail,
-                                    "pfp": (
-                                        user.profile_image_url
-                                        if user and user.profile_image_url
-                                        else None
-                                    ),
-                                    "check": 0,
-                                }
-                            }
-                        )
+    async def _tick(self) -> None:
+        config = self.bot.config
+        start = time.perf_counter()
+        try:
+            streams = await TwitchHelper.get_streams(self.ttv_client, [config.streamer])
+            stream = streams[config.streamer]
+            self.bot._log.info("Stream check for '%s': %s", config.streamer, stream)
+
+            if stream and stream.user_name not in self.live:
+                # The profile picture is normally cached, leaving one send per guild.
+                pfp = await self._profile(stream.user_login)
+                thumbnail = stream.thumbnail_url.replace("{width}", "1280").replace(
+                    "{height}", "720"
+                )
+
+                embed = EmbedCreator.twitch_embed(
+                    title=stream.title,
+                    stream_name=stream.user_name,
+                    stream_game=stream.game_name,
+                    viewer_count=stream.viewer_count,
+                    twitch_pfp=pfp,
+                    thumbnail=thumbnail + "?rand=" + str(int(time.time())),
+                    footer=config.name,
+                )
+                posts = await self._fan_out(
+                    lambda guild_id: self._announce(guild_id, embed), list(self.targets)
+                )
+
+                delay = time.time() - stream.started_at.timestamp()
+                for _ in posts:
+                    ANNOUNCE_DELAY_SECONDS.observe(delay)
+                self.bot._log.info(
+                    "Announced '%s' in %d guild(s) %.1fs after going live",
+                    stream.user_name,
+                    len(posts),
+                    delay,
+                )
+
+                self.streamer_index.invalidate()
+                self.live[stream.user_name] = LiveStream(
+                    user_id=stream.user_id,
+                    game=stream.game_name,
+                    thumbnail=thumbnail,
+                    pfp=pfp,
+                    posts=posts,
+                )
 
             remove_stream = []
             for user, messages in self.live.items():
+                posts = messages.posts
                 if stream is None:
-                    if messages["check"] >= TTV_TIMEOUT:
+                    if messages.check >= config.ttv_timeout:
+                        if self.budget.low:
+                            # The VOD link can wait for the budget to refill; check stays due.
+                            continue
                         archive = await first(
                             self.ttv_client.get_videos(
-                                user_id=messages["user_id"],
+                                user_id=messages.user_id,
                                 video_type=VideoType.ARCHIVE,
                                 first=1,
                                 sort=SortMethod.TIME,
                             )
                         )
 
+                        offline = None
                         if archive:
-                            await self.stream_thread.send(
-                                embed=EmbedCreator.twitch_offline_embed(
-                                    stream_name=user,
-                                    stream_game=messages["game"],
-                                    twitch_pfp=messages["pfp"],
-                                    archive_video=archive.url,
-                                )
+                            offline = EmbedCreator.twitch_offline_embed(
+                                stream_name=user,
+                                stream_game=messages.game,
+                                twitch_pfp=messages.pfp,
+                                archive_video=archive.url,
+                                footer=config.name,
                             )
 
-                        remove_embed = await self.stream_channel.fetch_message(
-                            messages["embed"]
-                        )
-                        remove_role = await self.stream_channel.fetch_message(
-                            messages["role"]
+                        guild_ids = list(posts)
+                        retired = await self._fan_out(
+                            lambda guild_id: self._retire(guild_id, posts[guild_id], offline),
+                            [guild_id for guild_id in guild_ids if guild_id in self.targets],
                         )
+                        for guild_id in guild_ids:
+                            if guild_id in retired or guild_id not in self.targets:
+                                posts.pop(guild_id, None)
 
-                        await remove_embed.delete()
-                        await remove_role.delete()
-
-                        remove_stream.append(user)
+                        if not posts:
+                            remove_stream.append(user)
                     else:
-                        check = messages["check"] + 1
-                        self.live[user].update({"check": check})
+                        messages.check += 1
                 else:
-                    e_thumbnail = (
-                        messages["thumbnail"] + "?rand=" + str(int(time.time()))
-                    )
-
                     embed = EmbedCreator.twitch_embed(
                         title=stream.title,
                         stream_name=user,
                         stream_game=stream.game_name,
                         viewer_count=stream.viewer_count,
-                        twitch_pfp=messages["pfp"],
-                        thumbnail=e_thumbnail,
+                        twitch_pfp=messages.pfp,
+                        thumbnail=messages.thumbnail + "?rand=" + str(int(time.time())),
+                        footer=config.name,
                     )
 
-                    try:
-                        embed_stream = await self.stream_channel.fetch_message(
-                            messages["embed"]
+                    posted = [guild_id for guild_id in posts if guild_id in self.targets]
+                    refreshed = await self._fan_out(
+                        lambda guild_id: self._refresh(guild_id, posts[guild_id], embed),
+                        posted,
+                    )
+                    for guild_id, message_id in refreshed.items():
+                        posts[guild_id].embed = message_id
+
+                    # Guilds that subscribed after the stream went live still get announced.
+                    missing = [guild_id for guild_id in self.targets if guild_id not in posts]
+                    if missing:
+                        posts.update(
+                            await self._fan_out(
+                                lambda guild_id: self._announce(guild_id, embed), missing
+                            )
                         )
 
-                        await embed_stream.edit(embed=embed)
-                    except discord.errors.NotFound:
-                        new_embed = await self.stream_channel.send(embed=embed)
-                        self.live[user].update({"embed": new_embed.id})
-
-                    self.live[user].update({"check": 0})
+                    await self._record(user, stream)
+                    messages.check = 0
 
             for user in remove_stream:
                 self.live.pop(user, None)
-
-            JsonHelper.save_json(self.live, "json/live.json")
+                await self._end_session(user)
+            if remove_stream:
+                self.streamer_index.invalidate()
+                # Pick up a changed profile picture now rather than when the next stream starts.
+                if not self.budget.low:
+                    self.profiles.pop(config.streamer.lower(), None)
+                    await self._profile(config.streamer)
+
+            save_live(self.live, config.path("live.json"))
         except Exception as error:
             self.bot._log.exception("EXCEPTION:", exc_info=error)
-            sentry_sdk.capture_exception(error)
+            capture_error(error)
+        finally:
+            STREAM_LOOP_SECONDS.observe(time.perf_counter() - start)
+
+    ###########################################################################
+    # stream_group Commands
+    ###########################################################################
+    stream_group = app_commands.Group(name="stream", description="Stream statistics.")
+
+    @stream_group.command(name="stats", description="See a streamer's viewer stats and history.")
+    @app_commands.describe(streamer="Streamer to show; the bot's own streamer when omitted.")
+    async def stream_stats(self, interaction: Interaction, streamer: str | None = None) -> None:
+        """See a streamer's viewer stats and history."""
+        streamer = streamer or self.bot.config.streamer
+        history = self.session_log.sessions(streamer)
+        session = next(
+            (s for name, s in self.sessions.items() if name.lower() == streamer.lower()), None
+        )
+        if not history and session is None:
+            await interaction.response.send_message(
+                f"No stream sessions recorded for {streamer} yet.", ephemeral=True
+            )
+            return
+
+        fields: dict[str, str] = {}
+        if session is not None:
+            _, values = session.viewers.ordered()
+            fields["Live now"] = (
+                f"{format_duration(session.length)} · {values[-1]} viewers · "
+                f"peak {session.viewers.peak} · avg {session.viewers.average:.0f} · "
+                f"{session.games[-1][1]}\n{sparkline(values)}"
+            )
+
+        if history:
+            last = history[-1]
+            record = await asyncio.to_thread(self.session_log.read, last)
+            fields["Last session"] = (
+                f"{_session_line(last)}\n{sparkline(decode_viewers(record))}"
+            )
+
+            streamed = sum(summary.length for summary in history)
+            samples = sum(summary.samples for summary in history)
+            average = sum(s.average * s.samples for s in history) / max(samples, 1)
+            fields["All time"] = (
+                f"{len(history)} sessions · {format_duration(streamed)} · "
+                f"peak {max(summary.peak for summary in history)} · avg {average:.0f}"
+            )
+            fields["History"] = "\n".join(_session_line(s) for s in reversed(history[-8:]))
+
+        await interaction.response.send_message(
+            embed=EmbedCreator.stream_stats_embed(
+                self.session_log.names.get(streamer.lower(), streamer),
+                fields,
+                footer=self.bot.config.name,
+            )
+        )
+
+    @stream_stats.autocomplete("streamer")
+    async def streamer_autocomplete(
+        self, interaction: Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        """Suggests streamers that are live or have recorded sessions."""
+        return choices(self.streamer_index.search(current))
+
+
+def _session_line(summary: SessionSummary) -> str:
+    return (
+        f"<t:{summary.start}:d> {format_duration(summary.length)} · peak {summary.peak} · "
+        f"avg {summary.average:.0f} · {summary.game}"
+    )
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import sys
+
+import aiohttp
+import discord
+from dotenv import dotenv_values
+
+from donkeybot.helpers.aiohttp_helper import AIOHTTPHelper, share_connector
+from donkeybot.helpers.config_helper import (
+    LOOP_LAG_THRESHOLD,
+    METRICS_HOST,
+    METRICS_PORT,
+    BotConfig,
+    ConfigError,
+)
+from donkeybot.helpers.metrics_helper import MetricsServer
+from donkeybot.helpers.sentry_helper import ERRORS, capture_error
+from donkeybot.helpers.setup_logging import setup_logging
+from donkeybot.helpers.shutdown_helper import PhaseTimer, on_signals
+from donkeybot.helpers.twitch_helper import TwitchHelper
+from donkeybot.helpers.watchdog_helper import LoopWatchdog
+from donkeybot.main import DonkeyBot, create_bot
+
+_log = logging.getLogger("DonkeyBot.runner")
+
+
+def load_config(env_file: str) -> BotConfig:
+    """Builds a bot's config from an env file such as .env.anabot.
+
+    The instance is named after the file suffix and keeps its state in json/<name>/ unless
+    BOT_STATE_DIR is set."""
+    name = os.path.basename(env_file).partition(".env.")[2] or "donkeybot"
+    env = {**os.environ, **{k: v for k, v in dotenv_values(env_file).items() if v is not None}}
+    return BotConfig.from_env(env, state_dir=os.path.join("json", name))
+
+
+class BotRunner:
+    """Hosts several bots on one event loop, sharing the HTTP pool, Twitch clients and metrics.
+
+    Each bot runs under its own supervisor, so one crashing is restarted with backoff while
+    the others keep running."""
+
+    max_backoff = 300.0
+
+    def __init__(self, configs: list[BotConfig]) -> None:
+        self.configs = configs
+        self.bots: dict[str, DonkeyBot] = {}
+        self.connector: aiohttp.TCPConnector | None = None
+        self.metrics_server: MetricsServer | None = None
+        self.watchdog: LoopWatchdog | None = None
+        self.stopping = asyncio.Event()
+
+    async def stop(self) -> None:
+        """Shuts every bot down at once and keeps the supervisors from restarting them."""
+        self.stopping.set()
+        await asyncio.gather(*(bot.close() for bot in self.bots.values()))
+
+    async def _supervise(self, config: BotConfig) -> None:
+        backoff = 5.0
+        while not self.stopping.is_set():
+            bot = create_bot(config, standalone=False, connector=self.connector)
+            share_connector(bot.http)
+            bot.watchdog = self.watchdog
+            self.bots[config.name] = bot
+            try:
+                async with bot:
+                    await bot.start(config.discord_key)
+                return
+            except discord.LoginFailure:
+                _log.error("Bot %s failed to log in; not restarting it", config.name)
+                return
+            except Exception as error:
+                if self.stopping.is_set():
+                    return
+                _log.exception("Bot %s crashed; restarting in %.0fs", config.name, backoff)
+                capture_error(error)
+
+            try:
+                await asyncio.wait_for(self.stopping.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def run(self) -> None:
+        self.connector = aiohttp.TCPConnector(limit=0)
+
+        if LOOP_LAG_THRESHOLD > 0:
+            self.watchdog = LoopWatchdog(LOOP_LAG_THRESHOLD)
+            self.watchdog.start()
+
+        if METRICS_PORT:
+            self.metrics_server = MetricsServer(METRICS_HOST, METRICS_PORT)
+            await self.metrics_server.start()
+            _log.info("Serving metrics on %s:%s/metrics", METRICS_HOST, METRICS_PORT)
+
+        on_signals(lambda: asyncio.ensure_future(self.stop()))
+        try:
+            await asyncio.gather(*(self._supervise(config) for config in self.configs))
+        finally:
+            with PhaseTimer(_log).phase("close shared clients"):
+                if self.watchdog is not None:
+                    self.watchdog.stop()
+                if self.metrics_server is not None:
+                    await self.metrics_server.stop()
+                await TwitchHelper.close_clients()
+                await AIOHTTPHelper.close_session()
+                await self.connector.close()
+                ERRORS.flush()
+
+
+def main():
+    setup_logging()
+
+    env_files = sys.argv[1:] or [".env"]
+    try:
+        configs = [load_config(env_file) for env_file in env_files]
+    except ConfigError as error:
+        raise SystemExit(f"Invalid configuration: {error}")
+    names = [config.name for config in configs]
+    if len(set(names)) != len(names):
+        raise SystemExit(f"BOT_NAME must differ between bots, got {', '.join(names)}")
+
+    try:
+        asyncio.run(BotRunner(configs).run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()